@@ -3,23 +3,30 @@ arbitrage_logic.py
 Contains logic to detect arbitrage opportunities.
 """
 
-from typing import Dict, Any
+import numpy as np
+from typing import Dict, Any, Optional, Sequence
 from datetime import datetime
 
 def detect_arbitrage(prices1: Dict[str, float], prices2: Dict[str, float], threshold: float = 0.005) -> list[dict]:
     """
     Detect arbitrage opportunities between two price sources for each stock.
+    Tickers quoted by only one source are skipped.
     Returns a list of opportunity dicts.
     """
     opportunities = []
-    for ticker in prices1:
-        p1, p2 = prices1[ticker], prices2[ticker]
+    timestamp = None
+    for ticker, p1 in prices1.items():
+        p2 = prices2.get(ticker)
+        if p2 is None:
+            continue
         diff = abs(p1 - p2)
         avg = (p1 + p2) / 2
         diff_pct = diff / avg
         if diff_pct > threshold:
+            if timestamp is None:
+                timestamp = datetime.now().isoformat()
             opportunity = {
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": timestamp,
                 "ticker": ticker,
                 "price_source_1": p1,
                 "price_source_2": p2,
@@ -28,3 +35,121 @@ def detect_arbitrage(prices1: Dict[str, float], prices2: Dict[str, float], thres
             }
             opportunities.append(opportunity)
     return opportunities
+
+class PriceMatrix:
+    """
+    Latest prices aligned as a (sources x tickers) float64 array.
+    Missing quotes are NaN, so detection never needs every source to quote every ticker.
+    """
+
+    def __init__(self, tickers: Sequence[str], sources: Sequence[str]):
+        self.tickers = list(tickers)
+        self.sources = list(sources)
+        self.ticker_index = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.source_index = {source: i for i, source in enumerate(self.sources)}
+        self.prices = np.full((len(self.sources), len(self.tickers)), np.nan)
+
+    def update(self, source: str, prices: Dict[str, float]) -> None:
+        """Apply a {ticker: price} update; unknown tickers are ignored"""
+        row = self.prices[self.source_index[source]]
+        index = self.ticker_index
+        for ticker, price in prices.items():
+            column = index.get(ticker)
+            if column is not None:
+                row[column] = price
+
+    def update_row(self, source: str, prices: np.ndarray) -> None:
+        """Replace a source's full quote vector (NaN marks a missing quote)"""
+        self.prices[self.source_index[source]] = prices
+
+    def clear(self, source: str) -> None:
+        self.prices[self.source_index[source]] = np.nan
+
+# Compact fixed-size opportunity record: indexes instead of names, no timestamp string
+OPPORTUNITY_DTYPE = np.dtype([
+    ("tick", "<i8"),
+    ("ticker", "<i4"),
+    ("source_1", "<i2"),
+    ("source_2", "<i2"),
+    ("price_source_1", "<f8"),
+    ("price_source_2", "<f8"),
+    ("difference_pct", "<f8"),
+    ("estimated_profit", "<f8")
+])
+
+def detect_arbitrage_records(prices: np.ndarray, threshold: float = 0.005, tick: int = 0) -> np.ndarray:
+    """
+    Detect opportunities across every pair of sources at once.
+    `prices` is a (sources x tickers) array with NaN for missing quotes.
+    Returns an OPPORTUNITY_DTYPE array with one record per hit.
+    """
+    n_sources = prices.shape[0]
+    if n_sources < 2:
+        return np.empty(0, dtype=OPPORTUNITY_DTYPE)
+
+    first, second = np.triu_indices(n_sources, k=1)
+    p1 = prices[first]
+    p2 = prices[second]
+    diff = np.abs(p1 - p2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        diff_pct = diff / ((p1 + p2) / 2)
+        # NaN compares False, so pairs with a missing quote drop out here
+        hits = diff_pct > threshold
+
+    pair_idx, ticker_idx = np.nonzero(hits)
+    records = np.empty(len(pair_idx), dtype=OPPORTUNITY_DTYPE)
+    records["tick"] = tick
+    records["ticker"] = ticker_idx
+    records["source_1"] = first[pair_idx]
+    records["source_2"] = second[pair_idx]
+    records["price_source_1"] = p1[pair_idx, ticker_idx]
+    records["price_source_2"] = p2[pair_idx, ticker_idx]
+    records["difference_pct"] = diff_pct[pair_idx, ticker_idx] * 100
+    records["estimated_profit"] = diff[pair_idx, ticker_idx]
+    return records
+
+def records_to_opportunities(
+    records: np.ndarray,
+    tickers: Sequence[str],
+    sources: Sequence[str],
+    timestamp: Optional[str] = None
+) -> list[dict]:
+    """Expand compact records into the opportunity dicts written to the journal"""
+    if len(records) == 0:
+        return []
+    if timestamp is None:
+        timestamp = datetime.now().isoformat()
+    return [
+        {
+            "timestamp": timestamp,
+            "ticker": tickers[t],
+            "source_1": sources[s1],
+            "source_2": sources[s2],
+            "price_source_1": a,
+            "price_source_2": b,
+            "difference_pct": pct,
+            "estimated_profit": profit
+        }
+        for t, s1, s2, a, b, pct, profit in zip(
+            records["ticker"].tolist(),
+            records["source_1"].tolist(),
+            records["source_2"].tolist(),
+            records["price_source_1"].tolist(),
+            records["price_source_2"].tolist(),
+            np.round(records["difference_pct"], 4).tolist(),
+            np.round(records["estimated_profit"], 2).tolist()
+        )
+    ]
+
+def detect_arbitrage_matrix(
+    prices: np.ndarray,
+    tickers: Sequence[str],
+    sources: Sequence[str],
+    threshold: float = 0.005,
+    timestamp: Optional[str] = None
+) -> list[dict]:
+    """
+    Detect opportunities across every pair of sources at once.
+    All spreads are computed as array operations; dicts are built only for hits.
+    """
+    return records_to_opportunities(detect_arbitrage_records(prices, threshold), tickers, sources, timestamp)
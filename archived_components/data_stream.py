@@ -1,11 +1,15 @@
 """
 data_stream.py
-Simulates two real-time price feeds for stocks using asyncio (and mock websockets).
+Simulates real-time price feeds for stocks using asyncio (and mock websockets),
+and merges any number of feeds into one event stream.
 """
 
 import asyncio
 import random
-from typing import Dict, AsyncGenerator, List
+import time
+from collections import deque
+from typing import Any, AsyncGenerator, AsyncIterator, Deque, Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
 
 STOCKS = ["AAPL", "TSLA"]
 
@@ -23,12 +27,284 @@ async def simulate_price_feed(source: str, update_interval: float = 1.0) -> Asyn
         await asyncio.sleep(update_interval + random.uniform(0, 1))
         yield {"source": source, "prices": prices.copy()}
 
-async def merged_price_stream(update_interval: float = 1.0):
+class SyntheticMarket:
     """
-    Async generator yielding latest prices from both sources.
+    Vectorized random-walk market for stress tests: one true price per ticker
+    moved by a shared market factor plus idiosyncratic noise, and one quote per
+    source that tracks it with small independent noise, so sources stay
+    correlated. Each step can inject one-tick dislocations (spread_prob) and
+    start whole-source outages (outage_prob), during which that source's row
+    is NaN. The same seed always reproduces the same quotes. market_seed draws
+    the market factor and outages from their own stream, so markets over
+    separate slices of one universe (e.g. shards) still move together.
     """
-    feed1 = simulate_price_feed("BrokerA", update_interval)
-    feed2 = simulate_price_feed("BrokerB", update_interval)
+
+    def __init__(
+        self,
+        tickers: Union[int, Sequence[str]] = STOCKS,
+        sources: Sequence[str] = ("BrokerA", "BrokerB"),
+        seed: Optional[int] = None,
+        market_seed: Optional[int] = None,
+        volatility: float = 0.001,
+        market_beta: float = 0.5,
+        source_noise: float = 0.0005,
+        spread_prob: float = 0.0,
+        spread_size: float = 0.01,
+        outage_prob: float = 0.0,
+        outage_ticks: Tuple[int, int] = (5, 50)
+    ):
+        if isinstance(tickers, int):
+            tickers = [f"SYN{i:05d}" for i in range(tickers)]
+        self.tickers = list(tickers)
+        self.sources = list(sources)
+        self.volatility = volatility
+        self.market_beta = market_beta
+        self.source_noise = source_noise
+        self.spread_prob = spread_prob
+        self.spread_size = spread_size
+        self.outage_prob = outage_prob
+        self.outage_ticks = outage_ticks
+        self.rng = np.random.default_rng(seed)
+        self.market_rng = self.rng if market_seed is None else np.random.default_rng(market_seed)
+        self.true_prices = self.rng.uniform(100, 300, len(self.tickers))
+        self.outage_left = np.zeros(len(self.sources), dtype=np.int64)
+        self.quotes = np.empty((len(self.sources), len(self.tickers)))
+        self.tick = 0
+        self._refresh_quotes()
+
+    def _refresh_quotes(self) -> None:
+        n_sources, n_tickers = self.quotes.shape
+        noise = self.rng.normal(0.0, self.source_noise, (n_sources, n_tickers))
+        np.multiply(self.true_prices, np.exp(noise), out=self.quotes)
+
+        if self.spread_prob > 0:
+            hits = self.rng.random((n_sources, n_tickers)) < self.spread_prob
+            signs = self.rng.choice((-1.0, 1.0), size=int(hits.sum()))
+            self.quotes[hits] *= 1 + signs * self.spread_size
+
+        if self.outage_prob > 0:
+            starting = (self.outage_left == 0) & (self.market_rng.random(n_sources) < self.outage_prob)
+            low, high = self.outage_ticks
+            self.outage_left[starting] = self.market_rng.integers(low, high + 1, int(starting.sum()))
+            down = self.outage_left > 0
+            self.quotes[down] = np.nan
+            self.outage_left[down] -= 1
+
+    def step(self) -> np.ndarray:
+        """Advance one tick and return the (sources x tickers) quote array (reused between ticks)"""
+        market = self.market_rng.normal()
+        idio = self.rng.normal(size=len(self.tickers))
+        returns = self.volatility * (
+            self.market_beta * market + np.sqrt(1 - self.market_beta ** 2) * idio
+        )
+        self.true_prices *= np.exp(returns)
+        self._refresh_quotes()
+        self.tick += 1
+        return self.quotes
+
+    def advance_to(self, tick: int) -> np.ndarray:
+        """Step until the market reaches `tick`; a no-op if it already has"""
+        while self.tick < tick:
+            self.step()
+        return self.quotes
+
+    def bar(self, ticks_per_bar: int) -> Dict[str, np.ndarray]:
+        """Run ticks_per_bar ticks and return per-ticker OHLC arrays of the true price"""
+        path = np.empty((ticks_per_bar, len(self.tickers)))
+        for i in range(ticks_per_bar):
+            self.step()
+            path[i] = self.true_prices
+        return {
+            "open": path[0].copy(),
+            "high": path.max(axis=0),
+            "low": path.min(axis=0),
+            "close": path[-1].copy()
+        }
+
+    def prices_for(self, source: str) -> Optional[Dict[str, float]]:
+        """Current quotes of one source as a dict, or None while it is in an outage"""
+        row = self.quotes[self.sources.index(source)]
+        if np.isnan(row).all():
+            return None
+        return dict(zip(self.tickers, row.tolist()))
+
+async def synthetic_market_stream(market: SyntheticMarket, tick_rate: float = 0.0) -> AsyncGenerator[np.ndarray, None]:
+    """
+    Yield the quote array every tick. tick_rate is ticks per second; 0 runs as
+    fast as the consumer allows while still yielding to the event loop.
+    """
+    interval = 1.0 / tick_rate if tick_rate > 0 else 0.0
+    next_tick = time.monotonic()
+    while True:
+        quotes = market.step()
+        yield quotes
+        if interval:
+            next_tick += interval
+            await asyncio.sleep(max(0.0, next_tick - time.monotonic()))
+        else:
+            await asyncio.sleep(0)
+
+async def synthetic_price_feed(market: SyntheticMarket, source: str, tick_rate: float = 0.0) -> AsyncGenerator[Dict[str, Any], None]:
+    """
+    One source of a SyntheticMarket in the {"source", "prices"} shape of
+    simulate_price_feed, for the merger. Feeds of one market share its ticks:
+    whichever feed reaches a tick first steps the market. The source stays
+    silent during outages.
+    """
+    interval = 1.0 / tick_rate if tick_rate > 0 else 0.0
+    tick = market.tick
+    next_tick = time.monotonic()
     while True:
-        prices1, prices2 = await asyncio.gather(feed1.__anext__(), feed2.__anext__())
-        yield [prices1, prices2]
+        tick += 1
+        market.advance_to(tick)
+        prices = market.prices_for(source)
+        if prices is not None:
+            yield {"source": source, "prices": prices}
+        if interval:
+            next_tick += interval
+            await asyncio.sleep(max(0.0, next_tick - time.monotonic()))
+        else:
+            await asyncio.sleep(0)
+
+class PriceStreamMerger:
+    """
+    Merge any number of price feeds into one event stream.
+
+    Each feed is read by its own task, so a slow or stalled feed never holds
+    back the others: the latest quote per (source, ticker) is updated as soon
+    as it arrives and an event is emitted for every update. Pending updates are
+    bounded: with policy "coalesce" updates from the same source are merged
+    until the consumer catches up, with "drop" they queue up to max_pending and
+    the oldest are discarded. A batch_window > 0 groups updates into
+    micro-batches. Sources silent for stale_after seconds are reported stale.
+    """
+
+    def __init__(
+        self,
+        feeds: Dict[str, AsyncIterator[Dict[str, Any]]],
+        policy: str = "coalesce",
+        max_pending: int = 1024,
+        batch_window: float = 0.0,
+        stale_after: float = 5.0
+    ):
+        if policy not in ("coalesce", "drop"):
+            raise ValueError("policy must be 'coalesce' or 'drop'")
+        self.feeds = feeds
+        self.policy = policy
+        self.batch_window = batch_window
+        self.stale_after = stale_after
+        self.latest: Dict[str, Dict[str, float]] = {source: {} for source in feeds}
+        self.last_update: Dict[str, Optional[float]] = {source: None for source in feeds}
+        self.quote_times: Dict[str, Dict[str, float]] = {source: {} for source in feeds}
+        self._coalesced: Dict[str, Dict[str, float]] = {}
+        self._queue: Deque[Tuple[str, Dict[str, float]]] = deque(maxlen=max_pending)
+        self._wakeup = asyncio.Event()
+        self._live = 0
+        self._started: Optional[float] = None
+        self.received = {source: 0 for source in feeds}
+        self.emitted = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+    def _receive(self, source: str, prices: Dict[str, float]) -> None:
+        now = time.monotonic()
+        self.latest[source].update(prices)
+        self.last_update[source] = now
+        times = self.quote_times[source]
+        for ticker in prices:
+            times[ticker] = now
+        self.received[source] += 1
+
+        if self.policy == "coalesce":
+            pending = self._coalesced.get(source)
+            if pending is None:
+                self._coalesced[source] = dict(prices)
+            else:
+                pending.update(prices)
+                self.coalesced += 1
+        else:
+            if len(self._queue) == self._queue.maxlen:
+                self.dropped += 1
+            self._queue.append((source, prices))
+        self._wakeup.set()
+
+    async def _read(self, source: str, feed: AsyncIterator[Dict[str, Any]]) -> None:
+        try:
+            async for update in feed:
+                self._receive(source, update["prices"])
+        finally:
+            self._live -= 1
+            self._wakeup.set()
+
+    def _drain(self) -> Dict[str, Dict[str, float]]:
+        if self.policy == "coalesce":
+            updated, self._coalesced = self._coalesced, {}
+            return updated
+        updated: Dict[str, Dict[str, float]] = {}
+        while self._queue:
+            source, prices = self._queue.popleft()
+            updated.setdefault(source, {}).update(prices)
+        return updated
+
+    def stale_sources(self) -> List[str]:
+        """Sources that have not quoted within stale_after seconds (or ever)"""
+        now = time.monotonic()
+        return [
+            source for source, seen in self.last_update.items()
+            if seen is None or now - seen > self.stale_after
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self._started if self._started else 0.0
+        total = sum(self.received.values())
+        return {
+            "received": dict(self.received),
+            "emitted": self.emitted,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "updates_per_sec": total / elapsed if elapsed else 0.0,
+            "events_per_sec": self.emitted / elapsed if elapsed else 0.0,
+            "stale": self.stale_sources()
+        }
+
+    async def stream(self) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Yield {"updated", "latest", "stale", "timestamp"} for every update or
+        micro-batch. "latest" is the live quote book, not a copy.
+        """
+        self._started = time.monotonic()
+        self._live = len(self.feeds)
+        tasks = [asyncio.create_task(self._read(source, feed)) for source, feed in self.feeds.items()]
+        try:
+            while True:
+                if not self._coalesced and not self._queue:
+                    if self._live == 0:
+                        break
+                    await self._wakeup.wait()
+                    self._wakeup.clear()
+                    if self.batch_window > 0:
+                        await asyncio.sleep(self.batch_window)
+                updated = self._drain()
+                if updated:
+                    self.emitted += 1
+                    yield {
+                        "updated": updated,
+                        "latest": self.latest,
+                        "stale": self.stale_sources(),
+                        "timestamp": time.time()
+                    }
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+async def merged_price_stream(update_interval: float = 1.0, sources: Tuple[str, ...] = ("BrokerA", "BrokerB")):
+    """
+    Async generator yielding the latest prices from every source, once all of
+    them have quoted, each time any one of them updates.
+    """
+    merger = PriceStreamMerger({source: simulate_price_feed(source, update_interval) for source in sources})
+    async for event in merger.stream():
+        latest = event["latest"]
+        if all(latest.values()):
+            yield [{"source": source, "prices": dict(prices)} for source, prices in latest.items()]
@@ -8,6 +8,8 @@ import json
 import os
 import time
 from simulator import Simulator, OPPORTUNITY_LOG
+from opportunity_journal import read_journal
+from opportunity_rollups import OpportunityRollups, rollup_path
 
 st.set_page_config(page_title="Stock Arbitrage Bot", layout="wide")
 
@@ -15,6 +17,8 @@ if "sim" not in st.session_state:
     st.session_state.sim = Simulator()
     st.session_state.sim_task = None
     st.session_state.paused = False
+    # Start from the simulator's last rollup snapshot rather than replaying the whole journal
+    st.session_state.rollups = OpportunityRollups.load(rollup_path(OPPORTUNITY_LOG))
 
 st.title("🧠 Stock Arbitrage Trading Bot (Simulation)")
 
@@ -42,6 +46,7 @@ with col3:
     if st.button("🔄 Restart"):
         st.session_state.sim.reset()
         st.session_state.sim = Simulator()
+        st.session_state.rollups = OpportunityRollups()
         st.session_state.sim_task = None
         st.session_state.paused = False
         st.experimental_rerun()
@@ -51,33 +56,36 @@ st.markdown("---")
 # Live prices
 st.subheader("📈 Live Prices")
 latest = st.session_state.sim.latest_prices
+quotes = st.session_state.sim.latest_quotes
 if latest:
     st.json(latest)
+elif quotes is not None:
+    market = st.session_state.sim.market
+    st.write(f"{len(market.tickers):,} tickers x {len(market.sources)} sources (tick {market.tick:,})")
 else:
     st.write("Waiting for prices...")
 
 # Opportunities
 st.subheader("💡 Arbitrage Opportunities")
+rollups = st.session_state.rollups
 if os.path.exists(OPPORTUNITY_LOG):
-    with open(OPPORTUNITY_LOG) as f:
-        data = json.load(f)
-    st.write(f"Total: {len(data)}")
-    st.dataframe(data)
+    # Only journal records past the snapshot or the last rerun are read, in bounded chunks
+    rollups.catch_up(OPPORTUNITY_LOG)
+if rollups.totals["count"]:
+    st.write(f"Total: {rollups.totals['count']}")
+    page = st.number_input("Page", min_value=0, value=0, step=1)
+    st.dataframe(rollups.recent_page(int(page), 50))
     # Simple historical graph (opportunities per hour)
     import pandas as pd
-    df = pd.DataFrame(data)
-    if not df.empty:
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df['hour'] = df['timestamp'].dt.floor('H')
-        chart = df.groupby('hour').size()
-        st.line_chart(chart)
+    hourly = pd.DataFrame(rollups.series("hour")).set_index("bucket")
+    st.line_chart(hourly["count"])
 else:
     st.write("No opportunities detected yet.")
 
 # Export
 if st.button("⬇️ Export Opportunities as JSON"):
     if os.path.exists(OPPORTUNITY_LOG):
-        with open(OPPORTUNITY_LOG) as f:
-            st.download_button("Download JSON", f.read(), file_name="opportunities.json")
+        data, _ = read_journal(OPPORTUNITY_LOG)
+        st.download_button("Download JSON", json.dumps(data, indent=2), file_name="opportunities.json")
     else:
         st.warning("No data to export.")
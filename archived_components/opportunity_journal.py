@@ -0,0 +1,174 @@
+"""
+opportunity_journal.py
+Append-only JSONL journal for arbitrage opportunities, flushed in batches from a background thread.
+"""
+
+import os
+import json
+import threading
+from typing import Callable, Iterable, List, Optional, Tuple
+
+JOURNAL_DIR = "logs/opportunities"
+SEGMENT_PREFIX = "opportunities-"
+SEGMENT_SUFFIX = ".jsonl"
+
+# (segment number, byte offset within that segment)
+Cursor = Tuple[int, int]
+
+def segment_name(number: int) -> str:
+    return f"{SEGMENT_PREFIX}{number:06d}{SEGMENT_SUFFIX}"
+
+def list_segments(directory: str) -> List[int]:
+    """Segment numbers present in a journal directory, oldest first"""
+    if not os.path.isdir(directory):
+        return []
+    numbers = []
+    for name in os.listdir(directory):
+        if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+            numbers.append(int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]))
+    return sorted(numbers)
+
+class OpportunityJournal:
+    """
+    Writers only append to an in-memory batch, so logging an opportunity costs
+    the same however long the run has been going. A flusher thread writes each
+    batch with one write() call and fsync, and segments rotate at segment_bytes.
+    Every record is one newline-terminated line, so a crash can at most leave a
+    torn final line, which is truncated on the next open and skipped by readers.
+    on_flush, if given, is called from the flusher with each written batch and
+    the cursor just past it, so derived state can track the journal exactly.
+    """
+
+    def __init__(
+        self,
+        directory: str = JOURNAL_DIR,
+        segment_bytes: int = 64 * 1024 * 1024,
+        flush_interval: float = 0.5,
+        batch_size: int = 1000,
+        fsync: bool = True,
+        on_flush: Optional[Callable[[List[dict], Cursor], None]] = None
+    ):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.fsync = fsync
+        self.on_flush = on_flush
+        self._pending: List[str] = []
+        self._pending_records: List[dict] = []
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._closed = False
+
+        os.makedirs(directory, exist_ok=True)
+        segments = list_segments(directory)
+        self._segment = segments[-1] if segments else 1
+        self._file = open(os.path.join(directory, segment_name(self._segment)), "ab")
+        self._recover()
+
+        self._thread = threading.Thread(target=self._flush_loop, name="opportunity-journal", daemon=True)
+        self._thread.start()
+
+    def _recover(self) -> None:
+        """Drop a torn trailing line left by a crash mid-write"""
+        path = self._file.name
+        size = os.path.getsize(path)
+        if size == 0:
+            return
+        with open(path, "rb+") as f:
+            f.seek(max(0, size - 65536))
+            tail = f.read()
+            if tail.endswith(b"\n"):
+                return
+            cut = tail.rfind(b"\n")
+            f.truncate(size - len(tail) + cut + 1 if cut >= 0 else 0)
+
+    def append(self, opportunities: Iterable[dict]) -> None:
+        """Queue records for the next flush; never touches the disk"""
+        opportunities = list(opportunities)
+        lines = [json.dumps(opp, separators=(",", ":")) + "\n" for opp in opportunities]
+        if not lines:
+            return
+        with self._cond:
+            if self._closed:
+                raise ValueError("Journal is closed")
+            self._pending.extend(lines)
+            if self.on_flush is not None:
+                self._pending_records.extend(opportunities)
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+
+    def _flush_loop(self) -> None:
+        while True:
+            with self._cond:
+                if not self._pending and not self._closed:
+                    self._cond.wait(self.flush_interval)
+                closed = self._closed
+            self.flush()
+            if closed:
+                return
+
+    def flush(self) -> None:
+        """Write everything queued so far before returning"""
+        # Batches are taken under the I/O lock so they always land in append order
+        with self._io_lock:
+            with self._cond:
+                batch, self._pending = self._pending, []
+                records, self._pending_records = self._pending_records, []
+            if not batch:
+                return
+            self._file.write("".join(batch).encode())
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            cursor = (self._segment, self._file.tell())
+            if self._file.tell() >= self.segment_bytes:
+                self._rotate()
+            if self.on_flush is not None:
+                self.on_flush(records, cursor)
+
+    def _rotate(self) -> None:
+        self._file.close()
+        self._segment += 1
+        self._file = open(os.path.join(self.directory, segment_name(self._segment)), "ab")
+
+    def close(self) -> None:
+        """Flush outstanding records and stop the flusher thread"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        with self._io_lock:
+            self._file.close()
+
+def read_journal(
+    directory: str = JOURNAL_DIR,
+    cursor: Optional[Cursor] = None,
+    limit: Optional[int] = None
+) -> Tuple[List[dict], Cursor]:
+    """
+    Read records after `cursor` (None reads from the start) and return them with
+    the cursor to resume from. Only complete lines are consumed, so tailing a
+    journal that is still being written never yields half a record.
+    """
+    segments = list_segments(directory)
+    segment, offset = cursor or (segments[0] if segments else 1, 0)
+    records: List[dict] = []
+
+    for number in segments:
+        if number < segment:
+            continue
+        if number > segment:
+            segment, offset = number, 0
+        with open(os.path.join(directory, segment_name(number)), "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                records.append(json.loads(line))
+                offset += len(line)
+                if limit is not None and len(records) >= limit:
+                    return records, (segment, offset)
+    return records, (segment, offset)
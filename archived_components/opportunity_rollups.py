@@ -0,0 +1,161 @@
+"""
+opportunity_rollups.py
+Incremental time-bucketed rollups of arbitrage opportunities for the dashboard.
+"""
+
+import os
+import json
+from collections import OrderedDict, deque
+from datetime import datetime
+from itertools import islice
+from typing import Any, Deque, Dict, Iterable, List, Optional
+from opportunity_journal import Cursor, read_journal
+
+# Persisted next to the journal segments; list_segments ignores it
+ROLLUP_FILE = "rollups.json"
+# Journal records read and folded in per read_journal call while catching up
+CATCH_UP_CHUNK = 10_000
+
+RESOLUTIONS = {"minute": 60, "hour": 3600}
+# Buckets kept per resolution: one day of minutes, thirty days of hours
+RETENTION = {"minute": 24 * 60, "hour": 30 * 24}
+
+def _new_stats() -> Dict[str, Any]:
+    return {"count": 0, "profit": 0.0, "max_spread": 0.0}
+
+def _add_to(stats: Dict[str, Any], profit: float, spread: float) -> None:
+    stats["count"] += 1
+    stats["profit"] += profit
+    if spread > stats["max_spread"]:
+        stats["max_spread"] = spread
+
+class OpportunityRollups:
+    """
+    Count, summed estimated profit and max spread per minute and per hour,
+    overall and per ticker, updated as opportunities arrive. Each event costs
+    O(1) and memory is bounded by RETENTION and recent_limit, so dashboard
+    queries take the same time however long the simulator has been running.
+    The simulator keeps a persisted copy (save/load) with the journal cursor
+    it covers, so a new dashboard session only reads the journal past it.
+    """
+
+    def __init__(self, recent_limit: int = 1000):
+        self.buckets: Dict[str, "OrderedDict[int, Dict[str, Any]]"] = {
+            resolution: OrderedDict() for resolution in RESOLUTIONS
+        }
+        self.recent: Deque[dict] = deque(maxlen=recent_limit)
+        self.totals = _new_stats()
+        self.cursor: Optional[Cursor] = None
+        self._last_timestamp = None
+        self._last_epoch = 0
+
+    def _epoch(self, timestamp: str) -> int:
+        # Opportunities from one tick share a timestamp, so parse each string once
+        if timestamp != self._last_timestamp:
+            self._last_timestamp = timestamp
+            self._last_epoch = int(datetime.fromisoformat(timestamp).timestamp())
+        return self._last_epoch
+
+    def add(self, opportunities: Iterable[dict]) -> None:
+        for opp in opportunities:
+            epoch = self._epoch(opp["timestamp"])
+            ticker = opp["ticker"]
+            profit = opp["estimated_profit"]
+            spread = opp["difference_pct"]
+
+            _add_to(self.totals, profit, spread)
+            for resolution, seconds in RESOLUTIONS.items():
+                buckets = self.buckets[resolution]
+                start = epoch - epoch % seconds
+                bucket = buckets.get(start)
+                if bucket is None:
+                    bucket = buckets[start] = {**_new_stats(), "tickers": {}}
+                    if len(buckets) > RETENTION[resolution]:
+                        buckets.popitem(last=False)
+                _add_to(bucket, profit, spread)
+                per_ticker = bucket["tickers"].get(ticker)
+                if per_ticker is None:
+                    per_ticker = bucket["tickers"][ticker] = _new_stats()
+                _add_to(per_ticker, profit, spread)
+            self.recent.append(opp)
+
+    def catch_up(self, directory: str, chunk: int = CATCH_UP_CHUNK) -> int:
+        """
+        Fold in journal records past the cursor, at most `chunk` in memory at a
+        time; returns how many were read
+        """
+        total = 0
+        while True:
+            records, self.cursor = read_journal(directory, self.cursor, limit=chunk)
+            self.add(records)
+            total += len(records)
+            if len(records) < chunk:
+                return total
+
+    def save(self, path: str) -> None:
+        """Write the rollups and their journal cursor atomically"""
+        state = {
+            "buckets": {
+                resolution: [[start, bucket] for start, bucket in buckets.items()]
+                for resolution, buckets in self.buckets.items()
+            },
+            "recent": list(self.recent),
+            "recent_limit": self.recent.maxlen,
+            "totals": self.totals,
+            "cursor": self.cursor
+        }
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, recent_limit: int = 1000) -> "OpportunityRollups":
+        """Rollups saved at path, or empty ones (cursor at the journal start) if there are none"""
+        rollups = cls(recent_limit)
+        try:
+            with open(path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return rollups
+        for resolution, buckets in state["buckets"].items():
+            rollups.buckets[resolution] = OrderedDict((start, bucket) for start, bucket in buckets)
+        rollups.recent = deque(state["recent"], maxlen=state.get("recent_limit", recent_limit))
+        rollups.totals = state["totals"]
+        rollups.cursor = tuple(state["cursor"]) if state["cursor"] else None
+        return rollups
+
+    def series(self, resolution: str = "hour", ticker: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Chronological rollups for one resolution, overall or for a single ticker"""
+        rows = []
+        for start, bucket in self.buckets[resolution].items():
+            stats = bucket if ticker is None else bucket["tickers"].get(ticker)
+            if stats is None:
+                continue
+            rows.append({
+                "bucket": datetime.fromtimestamp(start).isoformat(),
+                "count": stats["count"],
+                "profit": round(stats["profit"], 2),
+                "max_spread": stats["max_spread"]
+            })
+        return rows
+
+    def top_tickers(self, resolution: str = "hour", n: int = 10) -> List[Dict[str, Any]]:
+        """Tickers with the most opportunities in the latest bucket"""
+        buckets = self.buckets[resolution]
+        if not buckets:
+            return []
+        latest = buckets[next(reversed(buckets))]["tickers"]
+        ranked = sorted(latest.items(), key=lambda item: item[1]["count"], reverse=True)[:n]
+        return [{"ticker": ticker, **stats} for ticker, stats in ranked]
+
+    def recent_page(self, page: int = 0, page_size: int = 50) -> List[dict]:
+        """Newest-first page of the most recent opportunities"""
+        start = page * page_size
+        return list(islice(reversed(self.recent), start, start + page_size))
+
+    def reset(self) -> None:
+        self.__init__(self.recent.maxlen)
+
+def rollup_path(directory: str) -> str:
+    return os.path.join(directory, ROLLUP_FILE)
@@ -0,0 +1,230 @@
+"""
+replay.py
+Replays recorded ticks or historical bars through arbitrage detection as fast as the CPU allows.
+"""
+
+import os
+import json
+import time
+import multiprocessing as mp
+import numpy as np
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from arbitrage_logic import detect_arbitrage_records, records_to_opportunities
+
+TAPE_VERSION = 1
+
+class TapeWriter:
+    """
+    Append-only tick tape: a (sources x tickers) float64 quote array per tick
+    and an epoch-seconds timestamp, written as raw little-endian files next
+    to a meta.json so readers can memory-map them. Opening an existing tape
+    continues it if it has the same universe and refuses it otherwise, since
+    its bytes would be read under the wrong shape.
+    """
+
+    def __init__(self, directory: str, tickers: Sequence[str], sources: Sequence[str]):
+        self.directory = directory
+        self.shape = (len(sources), len(tickers))
+        meta = {"version": TAPE_VERSION, "tickers": list(tickers), "sources": list(sources)}
+        os.makedirs(directory, exist_ok=True)
+        meta_path = os.path.join(directory, "meta.json")
+        ticks = 0
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                existing = json.load(f)
+            if existing != meta:
+                raise ValueError(
+                    f"{directory} holds a tape of another version or universe; record to a new directory"
+                )
+            tick_bytes = 8 * self.shape[0] * self.shape[1]
+            ticks = min(self._size("timestamps.bin") // 8, self._size("prices.bin") // tick_bytes)
+        else:
+            with open(meta_path, "w") as f:
+                json.dump(meta, f)
+        self._prices = open(os.path.join(directory, "prices.bin"), "ab")
+        self._times = open(os.path.join(directory, "timestamps.bin"), "ab")
+        # Continue after the last whole tick, dropping a write torn by a crash (or stray files of a new tape)
+        self._prices.truncate(ticks * 8 * self.shape[0] * self.shape[1])
+        self._times.truncate(ticks * 8)
+
+    def _size(self, name: str) -> int:
+        path = os.path.join(self.directory, name)
+        return os.path.getsize(path) if os.path.exists(path) else 0
+
+    def write(self, timestamp: float, quotes: np.ndarray) -> None:
+        self._times.write(np.float64(timestamp).tobytes())
+        self._prices.write(np.ascontiguousarray(quotes, dtype="<f8").tobytes())
+
+    def close(self) -> None:
+        self._prices.close()
+        self._times.close()
+
+class Tape:
+    """Read side of a tape: timestamps and quotes memory-mapped, never loaded whole"""
+
+    def __init__(self, directory: str):
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+        if meta.get("version") != TAPE_VERSION:
+            raise ValueError(f"Unsupported tape version: {meta.get('version')}")
+        self.tickers: List[str] = meta["tickers"]
+        self.sources: List[str] = meta["sources"]
+        self.timestamps = np.memmap(os.path.join(directory, "timestamps.bin"), dtype="<f8", mode="r")
+        ticks = len(self.timestamps)
+        self.prices = np.memmap(
+            os.path.join(directory, "prices.bin"), dtype="<f8", mode="r",
+            shape=(ticks, len(self.sources), len(self.tickers))
+        )
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def batches(self, batch_ticks: int) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+        """Yield (first_tick, timestamps, quotes) in contiguous slabs read straight off the map"""
+        for start in range(0, len(self), batch_ticks):
+            stop = min(start + batch_ticks, len(self))
+            yield start, np.asarray(self.timestamps[start:stop]), np.asarray(self.prices[start:stop])
+
+def record_market(market, ticks: int, directory: str, start: Optional[float] = None, tick_seconds: float = 1.0) -> None:
+    """Record `ticks` ticks of a SyntheticMarket to a tape on a virtual clock"""
+    clock = start if start is not None else time.time()
+    writer = TapeWriter(directory, market.tickers, market.sources)
+    try:
+        for _ in range(ticks):
+            writer.write(clock, market.step())
+            clock += tick_seconds
+    finally:
+        writer.close()
+
+def tape_from_bars(closes: Dict[str, Any], directory: str) -> None:
+    """
+    Build a tape from historical bars: one DataFrame of closes per source
+    (DatetimeIndex x ticker columns). Bars are aligned on the union of their
+    timestamps; a source with no bar at a timestamp is NaN (missing quote).
+    """
+    import pandas as pd
+
+    sources = list(closes)
+    tickers = sorted(set().union(*(frame.columns for frame in closes.values())))
+    index = closes[sources[0]].index
+    for frame in closes.values():
+        index = index.union(frame.index)
+    aligned = [closes[source].reindex(index=index, columns=tickers).to_numpy(dtype=np.float64) for source in sources]
+    epochs = pd.DatetimeIndex(index).asi8 / 1e9
+
+    writer = TapeWriter(directory, tickers, sources)
+    try:
+        quotes = np.stack(aligned, axis=1)  # (ticks, sources, tickers)
+        for timestamp, tick_quotes in zip(epochs, quotes):
+            writer.write(timestamp, tick_quotes)
+    finally:
+        writer.close()
+
+def replay_records(tape: Tape, threshold: float, batch_ticks: int = 256) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Detect over whole batches at once: a (ticks, sources, tickers) slab is
+    viewed as sources x (ticks * tickers) so one detection call covers every
+    tick in it. Yields (records with tape-global ticks, batch timestamps).
+    """
+    n_tickers = len(tape.tickers)
+    for start, timestamps, quotes in tape.batches(batch_ticks):
+        n_ticks = len(timestamps)
+        flat = quotes.transpose(1, 0, 2).reshape(len(tape.sources), n_ticks * n_tickers)
+        records = detect_arbitrage_records(flat, threshold)
+        position = records["ticker"].astype(np.int64)
+        records["tick"] = start + position // n_tickers
+        records["ticker"] = position % n_tickers
+        # Hits come out source-pair major; a stable sort by tick restores the live per-tick order
+        records = records[np.argsort(records["tick"], kind="stable")]
+        yield records, timestamps
+
+class ReplayEngine:
+    """
+    Drive detection from a tape on a virtual clock. Opportunities carry the
+    tape's timestamps rather than wall-clock time, so a month of ticks replays
+    in seconds and produces the same records the live simulator would have.
+    """
+
+    def __init__(self, directory: str, threshold: float = 0.005, batch_ticks: int = 256):
+        self.tape = Tape(directory)
+        self.threshold = threshold
+        self.batch_ticks = batch_ticks
+        self.clock: Optional[float] = None
+
+    def opportunities(self) -> Iterator[dict]:
+        """Every opportunity in tape order, as the live run would have journaled it"""
+        tape = self.tape
+        for records, timestamps in replay_records(tape, self.threshold, self.batch_ticks):
+            if len(records) == 0:
+                continue
+            boundaries = np.flatnonzero(np.diff(records["tick"])) + 1
+            for group in np.split(records, boundaries):
+                tick = int(group["tick"][0])
+                self.clock = float(tape.timestamps[tick])
+                timestamp = datetime.fromtimestamp(self.clock).isoformat()
+                yield from records_to_opportunities(group, tape.tickers, tape.sources, timestamp)
+
+    def run(self, journal=None, rollups=None) -> Dict[str, Any]:
+        """
+        Replay the whole tape. With a journal or rollups, opportunity dicts are
+        built and fed to them; otherwise only compact records are aggregated.
+        """
+        start = time.perf_counter()
+        count, profit, max_spread = 0, 0.0, 0.0
+        if journal is None and rollups is None:
+            for records, _ in replay_records(self.tape, self.threshold, self.batch_ticks):
+                if len(records):
+                    count += len(records)
+                    profit += float(records["estimated_profit"].sum())
+                    max_spread = max(max_spread, float(records["difference_pct"].max()))
+        else:
+            batch: List[dict] = []
+            for opp in self.opportunities():
+                batch.append(opp)
+                count += 1
+                profit += opp["estimated_profit"]
+                max_spread = max(max_spread, opp["difference_pct"])
+                if len(batch) >= 4096:
+                    self._emit(batch, journal, rollups)
+                    batch = []
+            self._emit(batch, journal, rollups)
+        elapsed = time.perf_counter() - start
+
+        ticks = len(self.tape)
+        return {
+            "threshold": self.threshold,
+            "ticks": ticks,
+            "opportunities": count,
+            "estimated_profit": round(profit, 2),
+            "max_spread_pct": round(max_spread, 4),
+            "elapsed": elapsed,
+            "ticks_per_sec": ticks / elapsed if elapsed else 0.0
+        }
+
+    @staticmethod
+    def _emit(batch: List[dict], journal, rollups) -> None:
+        if not batch:
+            return
+        if journal is not None:
+            journal.append(batch)
+        if rollups is not None:
+            rollups.add(batch)
+
+def _sweep_one(args: Tuple[str, float, int]) -> Dict[str, Any]:
+    directory, threshold, batch_ticks = args
+    return ReplayEngine(directory, threshold, batch_ticks).run()
+
+def sweep_thresholds(
+    directory: str,
+    thresholds: Sequence[float],
+    workers: Optional[int] = None,
+    batch_ticks: int = 256
+) -> List[Dict[str, Any]]:
+    """Replay one tape per threshold in parallel; every worker maps the same file, so pages are shared"""
+    jobs = [(directory, threshold, batch_ticks) for threshold in thresholds]
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        return [_sweep_one(job) for job in jobs]
+    with mp.Pool(workers) as pool:
+        return pool.map(_sweep_one, jobs)
@@ -0,0 +1,183 @@
+"""
+sharded_simulator.py
+Runs the arbitrage simulation on a process pool, one slice of the ticker universe per worker.
+"""
+
+import os
+import time
+import traceback
+import multiprocessing as mp
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Union
+from data_stream import SyntheticMarket
+from arbitrage_logic import OPPORTUNITY_DTYPE, detect_arbitrage_records, records_to_opportunities
+from opportunity_journal import OpportunityJournal, JOURNAL_DIR
+
+# Workers ship records in batches of roughly this many to keep queue traffic low
+BATCH_RECORDS = 4096
+
+def run_shard(
+    shard: int,
+    offset: int,
+    tickers: List[str],
+    sources: List[str],
+    ticks: int,
+    threshold: float,
+    seed: int,
+    market_seed: int,
+    market_kwargs: Dict[str, Any],
+    queue
+) -> None:
+    """
+    Worker entry point: simulate one shard and send opportunities back as raw
+    OPPORTUNITY_DTYPE bytes with global ticker indexes, then a stats message.
+    Every shard shares market_seed, so the market factor and source outages
+    are the same across the whole universe.
+    """
+    try:
+        market = SyntheticMarket(tickers, sources, seed=seed, market_seed=market_seed, **market_kwargs)
+        batch, batched, found = [], 0, 0
+        start = time.perf_counter()
+        for tick in range(ticks):
+            records = detect_arbitrage_records(market.step(), threshold, tick)
+            if len(records):
+                records["ticker"] += offset
+                batch.append(records)
+                batched += len(records)
+                found += len(records)
+                if batched >= BATCH_RECORDS:
+                    queue.put(("records", np.concatenate(batch).tobytes()))
+                    batch, batched = [], 0
+        if batch:
+            queue.put(("records", np.concatenate(batch).tobytes()))
+        queue.put(("done", {
+            "shard": shard,
+            "pid": os.getpid(),
+            "tickers": len(tickers),
+            "ticks": ticks,
+            "opportunities": found,
+            "elapsed": time.perf_counter() - start
+        }))
+    except Exception:
+        queue.put(("error", traceback.format_exc()))
+
+class ShardedSimulator:
+    """
+    Coordinator for a multi-process run. The universe is split into contiguous
+    ticker shards; each worker owns a SyntheticMarket for its shard and runs
+    detection locally, so the only cross-process traffic is the compact
+    opportunity records. The coordinator aggregates per-ticker counts, profit
+    and the widest spread, and can expand records into the opportunity journal.
+
+    This is a synthetic-only mode: a SyntheticMarket already hands detection
+    every source's quotes aligned per tick, so shards skip PriceStreamMerger
+    (and its per-ticker dicts) entirely. The market factor and outages come
+    from one market_seed shared by all shards and independent of the worker
+    count; only idiosyncratic noise is drawn per shard, so runs with different
+    worker counts are statistically, not bitwise, comparable. A single
+    SyntheticMarket(..., market_seed=sim.market_seed) follows the same factor path.
+    """
+
+    def __init__(
+        self,
+        tickers: Union[int, Sequence[str]],
+        sources: Sequence[str] = ("BrokerA", "BrokerB"),
+        workers: Optional[int] = None,
+        threshold: float = 0.005,
+        seed: Optional[int] = None,
+        journal: bool = False,
+        **market_kwargs
+    ):
+        if isinstance(tickers, int):
+            tickers = [f"SYN{i:05d}" for i in range(tickers)]
+        self.tickers = list(tickers)
+        self.sources = list(sources)
+        self.workers = workers or os.cpu_count() or 1
+        self.threshold = threshold
+        self.seed = seed
+        self.market_seed = int(np.random.SeedSequence(seed).generate_state(1)[0])
+        self.journal = OpportunityJournal(JOURNAL_DIR) if journal else None
+        self.market_kwargs = market_kwargs
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.opportunity_counts = np.zeros(len(self.tickers), dtype=np.int64)
+        self.total_opportunities = 0
+        self.total_profit = 0.0
+        self.max_spread_pct = 0.0
+
+    def _aggregate(self, records: np.ndarray) -> None:
+        self.opportunity_counts += np.bincount(records["ticker"], minlength=len(self.tickers))
+        self.total_opportunities += len(records)
+        self.total_profit += float(records["estimated_profit"].sum())
+        self.max_spread_pct = max(self.max_spread_pct, float(records["difference_pct"].max()))
+        if self.journal is not None:
+            self.journal.append(records_to_opportunities(records, self.tickers, self.sources))
+
+    def run(self, ticks: int) -> Dict[str, Any]:
+        """Run every shard for `ticks` ticks and return aggregate stats"""
+        workers = min(self.workers, len(self.tickers))
+        bounds = np.linspace(0, len(self.tickers), workers + 1).astype(int)
+        seeds = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(self.seed).spawn(workers)]
+
+        queue = mp.Queue()
+        procs = [
+            mp.Process(
+                target=run_shard,
+                args=(
+                    shard, int(bounds[shard]), self.tickers[bounds[shard]:bounds[shard + 1]],
+                    self.sources, ticks, self.threshold, seeds[shard], self.market_seed,
+                    self.market_kwargs, queue
+                ),
+                daemon=True
+            )
+            for shard in range(workers)
+        ]
+
+        start = time.perf_counter()
+        for proc in procs:
+            proc.start()
+
+        shard_stats = []
+        try:
+            while len(shard_stats) < workers:
+                kind, payload = queue.get()
+                if kind == "records":
+                    self._aggregate(np.frombuffer(payload, dtype=OPPORTUNITY_DTYPE))
+                elif kind == "done":
+                    shard_stats.append(payload)
+                else:
+                    raise RuntimeError(f"Shard worker failed:\n{payload}")
+        finally:
+            for proc in procs:
+                if proc.is_alive() and len(shard_stats) < workers:
+                    proc.terminate()
+                proc.join()
+            if self.journal is not None:
+                self.journal.flush()
+        elapsed = time.perf_counter() - start
+
+        return {
+            "workers": workers,
+            "tickers": len(self.tickers),
+            "sources": len(self.sources),
+            "ticks": ticks,
+            "opportunities": self.total_opportunities,
+            "estimated_profit": round(self.total_profit, 2),
+            "max_spread_pct": round(self.max_spread_pct, 4),
+            "elapsed": elapsed,
+            "quotes_per_sec": ticks * len(self.tickers) * len(self.sources) / elapsed,
+            "shards": sorted(shard_stats, key=lambda s: s["shard"])
+        }
+
+    def close(self) -> None:
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+# For CLI/manual test
+if __name__ == "__main__":
+    sim = ShardedSimulator(20_000, ["BrokerA", "BrokerB", "BrokerC"], seed=1, spread_prob=0.0005)
+    stats = sim.run(ticks=500)
+    print(f"{stats['workers']} workers: {stats['opportunities']} opportunities, "
+          f"{stats['quotes_per_sec'] / 1e6:.1f}M quotes/s")
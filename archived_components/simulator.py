@@ -1,26 +1,59 @@
 """
 simulator.py
-Orchestrates the simulation, manages state, and saves arbitrage opportunities to JSON.
+Orchestrates the simulation, manages state, and journals arbitrage opportunities.
 """
 
 import asyncio
-import json
 import os
-from data_stream import merged_price_stream
-from arbitrage_logic import detect_arbitrage
-from typing import Dict, Any
+import shutil
+import time
+from data_stream import merged_price_stream, synthetic_market_stream, SyntheticMarket
+from arbitrage_logic import detect_arbitrage, detect_arbitrage_matrix
+from opportunity_journal import OpportunityJournal, JOURNAL_DIR
+from opportunity_rollups import OpportunityRollups, rollup_path
+from replay import TapeWriter
+from typing import Dict, Any, Optional
 
-OPPORTUNITY_LOG = "logs/opportunities.json"
+OPPORTUNITY_LOG = JOURNAL_DIR
+# Seconds between rollup snapshots; a new dashboard session replays at most this much journal
+ROLLUP_SAVE_INTERVAL = 5.0
 
 class Simulator:
-    def __init__(self, threshold: float = 0.005):
+    def __init__(
+        self,
+        threshold: float = 0.005,
+        market: Optional[SyntheticMarket] = None,
+        tick_rate: float = 1.0,
+        record_to: Optional[str] = None
+    ):
         self.threshold = threshold
+        # With a SyntheticMarket the simulator runs vectorized over its whole universe
+        self.market = market
+        self.tick_rate = tick_rate
+        # Market-mode quotes are also written to this tape directory for later replay
+        self.record_to = record_to
         self.running = False
         self.latest_prices = {}
+        self.latest_quotes = None
         self.opportunities = []
+        self.journal = None
+        self.rollups = None
+        self._rollups_saved = 0.0
 
     async def run(self):
         self.running = True
+        try:
+            if self.market is None:
+                await self._run_feeds()
+            else:
+                await self._run_market()
+        finally:
+            if self.journal is not None:
+                self.journal.close()
+                self.journal = None
+                self.rollups.save(rollup_path(OPPORTUNITY_LOG))
+
+    async def _run_feeds(self):
         async for feeds in merged_price_stream():
             if not self.running:
                 break
@@ -36,19 +69,42 @@ class Simulator:
                 self.opportunities.extend(opps)
                 self.save_opportunities(opps)
 
-    def save_opportunities(self, opps):
-        os.makedirs("logs", exist_ok=True)
+    async def _run_market(self):
+        market = self.market
+        tape = TapeWriter(self.record_to, market.tickers, market.sources) if self.record_to else None
         try:
-            if os.path.exists(OPPORTUNITY_LOG):
-                with open(OPPORTUNITY_LOG, "r") as f:
-                    data = json.load(f)
-            else:
-                data = []
-        except Exception:
-            data = []
-        data.extend(opps)
-        with open(OPPORTUNITY_LOG, "w") as f:
-            json.dump(data, f, indent=2)
+            async for quotes in synthetic_market_stream(market, self.tick_rate):
+                if not self.running:
+                    break
+                self.latest_quotes = quotes
+                if tape is not None:
+                    tape.write(time.time(), quotes)
+                opps = detect_arbitrage_matrix(quotes, market.tickers, market.sources, self.threshold)
+                if opps:
+                    self.opportunities.extend(opps)
+                    self.save_opportunities(opps)
+        finally:
+            if tape is not None:
+                tape.close()
+
+    def save_opportunities(self, opps):
+        # Constant cost per event: records are queued and flushed in batches off the event loop
+        if self.journal is None:
+            os.makedirs(OPPORTUNITY_LOG, exist_ok=True)
+            # Pick up anything journaled after the last rollup snapshot before appending more
+            self.rollups = OpportunityRollups.load(rollup_path(OPPORTUNITY_LOG))
+            self.rollups.catch_up(OPPORTUNITY_LOG)
+            self.journal = OpportunityJournal(OPPORTUNITY_LOG, on_flush=self._update_rollups)
+        self.journal.append(opps)
+
+    def _update_rollups(self, opps, cursor):
+        # Runs on the journal's flusher thread, once per written batch
+        self.rollups.add(opps)
+        self.rollups.cursor = cursor
+        now = time.monotonic()
+        if now - self._rollups_saved >= ROLLUP_SAVE_INTERVAL:
+            self.rollups.save(rollup_path(OPPORTUNITY_LOG))
+            self._rollups_saved = now
 
     def stop(self):
         self.running = False
@@ -56,8 +112,10 @@ class Simulator:
     def reset(self):
         self.opportunities = []
         self.latest_prices = {}
+        self.latest_quotes = None
+        self.rollups = None
         if os.path.exists(OPPORTUNITY_LOG):
-            os.remove(OPPORTUNITY_LOG)
+            shutil.rmtree(OPPORTUNITY_LOG)
 
 # For CLI/manual test
 if __name__ == "__main__":
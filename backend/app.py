@@ -1,27 +1,74 @@
 import os
 import sys
-from flask import Flask, jsonify, request
+import atexit
+import json
+import time
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from flask import Blueprint, Flask, current_app, g, jsonify, request
 from flask_cors import CORS
-import yfinance as yf
-import requests
+from werkzeug.middleware.proxy_fix import ProxyFix
 
-# Add parent directory to path for config import
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Make the project root importable when run as `python app.py` from backend/
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
 from config import Config
 from utils import handle_api_errors, validate_symbol, validate_period, validate_interval, setup_logging
+from rate_limit import RateLimitExceeded, init_rate_limiter, rate_limited, charge_upstream
+from shared_cache import init_shared_cache
+from cache_snapshot import init_cache_snapshots, final_snapshot
 
-# Setup logging
-logger = setup_logging()
+# yfinance (pandas, numpy, requests, lxml) and numpy are imported on first use
+# so health checks, validation errors and worker boot never pay for them.
+HEAVY_MODULES = ('yfinance', 'candles', 'screener')
 
-app = Flask(__name__)
-app.config.from_object(Config)
-CORS(app, origins=Config.CORS_ORIGINS)
+logger = logging.getLogger(__name__)
+
+api = Blueprint('api', __name__, url_prefix='/api')
 
 # Allowed intervals and periods for safety
 ALLOWED_INTERVALS = Config.ALLOWED_INTERVALS
 ALLOWED_PERIODS = Config.ALLOWED_PERIODS
 
-@app.route('/api/health')
+def create_app(config_object=Config) -> Flask:
+    """
+    Application factory. Safe to call in a gunicorn --preload master: nothing
+    here opens connections, and with PRELOAD_HEAVY_IMPORTS set the heavy modules
+    are imported once before fork so workers share them copy-on-write.
+    """
+    setup_logging()
+
+    app = Flask(__name__)
+    app.config.from_object(config_object)
+    if app.config.get('TRUSTED_PROXIES'):
+        # Rate limits key on the client address, not the proxy's
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXIES'])
+    CORS(app, origins=app.config['CORS_ORIGINS'], expose_headers=['Retry-After'])
+    init_rate_limiter(app)
+    cache = init_shared_cache(app)
+    init_cache_snapshots(app, cache)
+    app.register_blueprint(api)
+
+    if app.config.get('PRELOAD_HEAVY_IMPORTS'):
+        for name in HEAVY_MODULES:
+            __import__(name)
+    return app
+
+def shared_cache():
+    return current_app.extensions['shared_cache']
+
+def stats_index():
+    """Screener index, created on first use so booting never imports numpy"""
+    index = current_app.extensions.get('stats_index')
+    if index is None:
+        from screener import StatsIndex
+        index = current_app.extensions['stats_index'] = StatsIndex(current_app.config['CACHE_PATH'])
+    return index
+
+@api.route('/health')
 def health_check():
     """Simple health check endpoint"""
     return jsonify({
@@ -30,85 +77,432 @@ def health_check():
         'version': '2.0'
     }), 200
 
-@app.route('/api/candles/<symbol>')
+def json_response(body: bytes):
+    """Serve an already-encoded JSON body without decoding it again"""
+    return current_app.response_class(body, mimetype='application/json')
+
+def load_candles(symbol, period, interval) -> bytes:
+    """Fetch candles from the upstream and pack them for the shared cache"""
+    import yfinance as yf
+    from candles import candles_from_frame, pack_candles
+
+    charge_upstream()
+    logger.info(f"Fetching candles for {symbol}, period: {period}, interval: {interval}")
+    data = yf.download(symbol, period=period, interval=interval)
+    if data.empty:
+        raise LookupError(f'No data found for symbol: {symbol}')
+    candles = candles_from_frame(data, Config.CANDLE_PRICE_DTYPE)
+    stats_index().update(symbol, period, interval, candles)
+    return pack_candles(candles)
+
+def load_company_info(symbol) -> bytes:
+    """Fetch company information from the upstream as encoded JSON"""
+    import yfinance as yf
+
+    charge_upstream()
+    logger.info(f"Fetching company info for {symbol}")
+    ticker = yf.Ticker(symbol)
+    info = ticker.info
+    
+    company_data = {
+        'symbol': symbol,
+        'companyName': info.get('longName', symbol),
+        'sector': info.get('sector', 'Unknown'),
+        'industry': info.get('industry', 'Unknown'),
+        'website': info.get('website', ''),
+        'description': info.get('longBusinessSummary', '')[:500],  # Limit description length
+        'marketCap': info.get('marketCap', 0),
+        'image': f"https://logo.clearbit.com/{info.get('website', '').replace('https://', '').replace('http://', '').split('/')[0]}" if info.get('website') else None
+    }
+    return json.dumps(company_data).encode()
+
+def load_company_news(symbol) -> bytes:
+    """Fetch recent news from the upstream as encoded JSON"""
+    import yfinance as yf
+
+    charge_upstream()
+    logger.info(f"Fetching news for {symbol}")
+    ticker = yf.Ticker(symbol)
+    news = ticker.news
+    
+    # Format news data
+    formatted_news = []
+    for item in news[:8]:  # Limit to 8 most recent
+        formatted_news.append({
+            'title': item.get('title', 'No title'),
+            'url': item.get('link', ''),
+            'publishedDate': item.get('providerPublishTime', ''),
+            'publisher': item.get('publisher', 'Unknown')
+        })
+    return json.dumps(formatted_news).encode()
+
+def candles_key(symbol, period, interval) -> str:
+    return f'candles:v2:{symbol}:{period}:{interval}'
+
+def cached_candles(symbol, period, interval) -> bytes:
+    """Packed candles from the shared cache, loading them from the upstream when stale"""
+    return shared_cache().get_or_load(
+        candles_key(symbol, period, interval),
+        Config.CACHE_TTL_CANDLES,
+        lambda: load_candles(symbol, period, interval)
+    )
+
+def candles_payload(candles, since=None):
+    """Every bar as records, or with `since` the delta a client cache merges in"""
+    from candles import candles_to_records
+
+    if since is None:
+        return candles_to_records(candles)
+    # The bar at `since` is resent because a live bar may have been revised since it was fetched
+    return {
+        'candles': candles_to_records(candles.since(since)),
+        'start': int(candles.time[0]) if len(candles) else None,
+        'length': len(candles)
+    }
+
+@api.route('/candles/<symbol>')
+@rate_limited
 @handle_api_errors
 def get_candles(symbol):
+    """
+    Candles for a symbol. With ?since=<epoch seconds> only bars at or after
+    that time are returned, along with the full series' start and length so
+    a client cache can merge them and drop bars that slid out of the period.
+    """
     symbol = validate_symbol(symbol)
     period = validate_period(request.args.get('period', '1mo'), ALLOWED_PERIODS)
     interval = validate_interval(request.args.get('interval', '1d'), ALLOWED_INTERVALS)
+    since = request.args.get('since')
+    since = int(since) if since else None
+    from candles import unpack_candles
 
-    logger.info(f"Fetching candles for {symbol}, period: {period}, interval: {interval}")
+    try:
+        buf = cached_candles(symbol, period, interval)
+    except RateLimitExceeded:
+        raise
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    return jsonify(candles_payload(unpack_candles(buf), since))
+
+@api.route('/indicators/<symbol>')
+@rate_limited
+@handle_api_errors
+def get_indicators(symbol):
+    """
+    Streaming indicator values, e.g. ?indicators=sma:20,rsi:14&since=<epoch>.
+    Indicator state is snapshotted in the shared cache next to the candles, with
+    the value history in separate fixed-size blocks, so a refresh only folds in
+    new or amended bars and rewrites the block holding them, and since= reads
+    just the blocks at or after that time instead of the whole series.
+    """
+    symbol = validate_symbol(symbol)
+    period = validate_period(request.args.get('period', '1mo'), ALLOWED_PERIODS)
+    interval = validate_interval(request.args.get('interval', '1d'), ALLOWED_INTERVALS)
+    from candles import unpack_candles
+    from indicators import HistoryMissing, parse_indicator_spec, load_series, dump_series, dump_history
+
+    keys = parse_indicator_spec(request.args.get('indicators', 'sma:20'))
+    since = request.args.get('since')
+    since = int(since) if since else None
 
     try:
-        data = yf.download(symbol, period=period, interval=interval)
-        if data.empty:
-            return jsonify({'error': f'No data found for symbol: {symbol}'}), 404
-        candles = []
-        for date, row in data.iterrows():
-            candles.append({
-                'date': date.strftime('%Y-%m-%d'),
-                'time': date.strftime('%Y-%m-%d'),
-                'open': float(row['Open']),
-                'high': float(row['High']),
-                'low': float(row['Low']),
-                'close': float(row['Close']),
-                'volume': int(row['Volume']) if 'Volume' in row else 0
-            })
-        return jsonify(candles)
+        buf = cached_candles(symbol, period, interval)
+    except RateLimitExceeded:
+        raise
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/company/<symbol>')
+    cache = shared_cache()
+    candles = unpack_candles(buf)
+    state_key = f'indicators:{symbol}:{period}:{interval}:{",".join(keys)}'
+
+    def read_block(name):
+        # Expired blocks are still valid; they are only gone once pruned
+        entry = cache.get_entry(f'{state_key}:{name}')
+        return entry[0] if entry else None
+
+    # One worker at a time saves a series; the others compute and serve without saving
+    with cache.lease(state_key) as owner:
+        # Expired snapshots are still valid starting points; apply() catches them up
+        entry = cache.get_entry(state_key)
+        series = load_series(entry[0] if entry else None, keys, read_block)
+        try:
+            changed = series.apply(candles)
+            values = series.since(since)
+        except HistoryMissing:
+            series.reset()
+            changed = series.apply(candles)
+            values = series.since(since)
+        if changed and owner:
+            # Blocks first, so a saved state never points at blocks that were not written
+            for name, block in dump_history(series).items():
+                cache.set(f'{state_key}:{name}', block, Config.CACHE_TTL_INDICATORS)
+            cache.set(state_key, dump_series(series), Config.CACHE_TTL_INDICATORS)
+    return jsonify({'symbol': symbol, 'interval': interval, 'indicators': keys, **values})
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def worker_pool(name, workers) -> ThreadPoolExecutor:
+    """Per-process named thread pool; pools do not survive a fork, so one is made per worker"""
+    with _pools_lock:
+        pool, pid = _pools.get(name, (None, None))
+        if pool is None or pid != os.getpid():
+            pool = ThreadPoolExecutor(workers, thread_name_prefix=name)
+            _pools[name] = (pool, os.getpid())
+        return pool
+
+def dashboard_executor() -> ThreadPoolExecutor:
+    """Pool for dashboard fan-out"""
+    return worker_pool('dashboard', Config.DASHBOARD_WORKERS)
+
+def run_with_app(app, rate_limit_key, fn):
+    """Run fn on a pool thread with the app context and the caller's rate-limit bucket"""
+    with app.app_context():
+        g.rate_limit_key = rate_limit_key
+        return fn()
+
+def fetch_candle_set(symbols, period, interval) -> dict:
+    """
+    Candles for many symbols at once, fetched concurrently. Every symbol that
+    is not fresh in the cache is charged as one upstream call, all up front, so
+    the pool threads fetching them are not charged again. At most
+    CORRELATION_MAX_UNCACHED symbols may need fetching per request.
+    Returns {symbol: CandleSeries or the exception that fetching it raised}.
+    """
+    from candles import unpack_candles
+
+    cache = shared_cache()
+    uncached = sum(cache.get(candles_key(symbol, period, interval)) is None for symbol in symbols)
+    if uncached > Config.CORRELATION_MAX_UNCACHED:
+        raise ValueError(
+            f'{uncached} symbols are not cached; a request may fetch at most {Config.CORRELATION_MAX_UNCACHED}'
+        )
+    if uncached:
+        charge_upstream(uncached)
+
+    app = current_app._get_current_object()
+    pool = worker_pool('correlation', Config.CORRELATION_FETCH_WORKERS)
+    futures = {
+        symbol: pool.submit(run_with_app, app, None, lambda symbol=symbol: cached_candles(symbol, period, interval))
+        for symbol in symbols
+    }
+    fetched = {}
+    for symbol, future in futures.items():
+        try:
+            fetched[symbol] = unpack_candles(future.result())
+        except Exception as e:
+            fetched[symbol] = e
+    return fetched
+
+def load_correlation(fetched, symbols, period, interval, window, benchmark) -> bytes:
+    """Returns matrix for a symbol set, built from candles fetched by fetch_candle_set"""
+    from correlation import returns_matrix
+
+    series, missing = {}, []
+    for symbol in symbols:
+        candles = fetched[symbol]
+        if isinstance(candles, Exception):
+            if not isinstance(candles, LookupError):
+                logger.error(f"Error fetching {symbol} for correlation: {str(candles)}")
+            missing.append(symbol)
+        else:
+            series[symbol] = candles
+    if len(series) < 2:
+        raise LookupError('Need candles for at least two symbols')
+
+    reference = fetched.get(benchmark) if benchmark else None
+    if isinstance(reference, Exception):
+        missing.append(benchmark)
+        reference = None
+    result = returns_matrix(series, window, reference)
+    result.update({'period': period, 'interval': interval, 'benchmark': benchmark, 'missing': missing})
+    return json.dumps(result).encode()
+
+@api.route('/correlation')
+@rate_limited
+@handle_api_errors
+def get_correlation():
+    """
+    Aligned log returns, covariance and correlation matrices and rolling betas
+    for ?symbols=AAPL,MSFT,... The result is cached per symbol set, period,
+    interval, window and benchmark.
+    """
+    symbols = sorted({validate_symbol(s) for s in request.args.get('symbols', '').split(',') if s.strip()})
+    if len(symbols) < 2:
+        raise ValueError('At least two symbols are required')
+    if len(symbols) > Config.CORRELATION_MAX_SYMBOLS:
+        raise ValueError(f'Too many symbols (max {Config.CORRELATION_MAX_SYMBOLS})')
+    period = validate_period(request.args.get('period', '1y'), ALLOWED_PERIODS)
+    interval = validate_interval(request.args.get('interval', '1d'), ALLOWED_INTERVALS)
+    window = int(request.args.get('window', 20))
+    if not 2 <= window <= 500:
+        raise ValueError('Window must be between 2 and 500')
+    benchmark = request.args.get('benchmark', Config.CORRELATION_BENCHMARK)
+    benchmark = validate_symbol(benchmark) if benchmark else ''
+
+    digest = hashlib.sha1(','.join(symbols).encode()).hexdigest()
+    key = f'correlation:{period}:{interval}:{window}:{benchmark}:{digest}'
+    cache = shared_cache()
+    try:
+        body = cache.get(key)
+        if body is None:
+            # Candles are fetched before taking the correlation lease, which then only covers the math
+            fetched = fetch_candle_set(sorted({*symbols, benchmark} - {''}), period, interval)
+            body = cache.get_or_load(
+                key,
+                Config.CACHE_TTL_CANDLES,
+                lambda: load_correlation(fetched, symbols, period, interval, window, benchmark)
+            )
+    except RateLimitExceeded:
+        raise
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        logger.error(f"Error computing correlation for {len(symbols)} symbols: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+    return json_response(body)
+
+@api.route('/screener')
+@rate_limited
+@handle_api_errors
+def get_screener():
+    """
+    Screen every symbol whose candles have been ingested for a period, e.g.
+    ?period=1y&change_pct_min=5&volume_ratio_min=3&new_high=1&sort=change_pct&limit=50.
+    Any stats column takes _min/_max bounds. Never touches raw bars or the upstream.
+    """
+    from screener import STAT_COLUMNS
+
+    period = validate_period(request.args.get('period', '1y'), ALLOWED_PERIODS)
+    interval = validate_interval(request.args.get('interval', '1d'), ALLOWED_INTERVALS)
+    ranges = {}
+    for name in STAT_COLUMNS:
+        low = request.args.get(f'{name}_min')
+        high = request.args.get(f'{name}_max')
+        if low is not None or high is not None:
+            ranges[name] = (float(low) if low is not None else None, float(high) if high is not None else None)
+    if request.args.get('new_high') == '1':
+        ranges['new_high'] = (1.0, None)
+
+    sort = request.args.get('sort', 'change_pct')
+    if sort not in STAT_COLUMNS:
+        raise ValueError(f'Invalid sort. Allowed: {", ".join(STAT_COLUMNS)}')
+    descending = request.args.get('order', 'desc') != 'asc'
+    limit = int(request.args.get('limit', 50))
+    if not 1 <= limit <= Config.SCREENER_MAX_RESULTS:
+        raise ValueError(f'Limit must be between 1 and {Config.SCREENER_MAX_RESULTS}')
+
+    total, rows = stats_index().screen(period, interval, ranges, sort, descending, limit)
+    return jsonify({'period': period, 'interval': interval, 'matches': total, 'results': rows})
+
+@api.route('/dashboard/<symbol>')
+@rate_limited
+@handle_api_errors
+def get_dashboard(symbol):
+    """
+    Candles, metrics, company info and news for one symbol in a single call.
+    The parts are fetched concurrently, each with its own deadline; a part
+    that fails or runs late comes back as null with a message in `errors`
+    while the others are still served. Accepts `since` like /api/candles.
+    """
+    symbol = validate_symbol(symbol)
+    period = validate_period(request.args.get('period', '1mo'), ALLOWED_PERIODS)
+    interval = validate_interval(request.args.get('interval', '1d'), ALLOWED_INTERVALS)
+    since = request.args.get('since')
+    since = int(since) if since else None
+
+    def candles_part():
+        from candles import unpack_candles, performance_metrics
+        candles = unpack_candles(cached_candles(symbol, period, interval))
+        return candles_payload(candles, since), performance_metrics(candles)
+
+    def company_part():
+        return json.loads(shared_cache().get_or_load(
+            f'company:{symbol}', Config.CACHE_TTL_COMPANY, lambda: load_company_info(symbol)
+        ))
+
+    def news_part():
+        return json.loads(shared_cache().get_or_load(
+            f'news:{symbol}', Config.CACHE_TTL_NEWS, lambda: load_company_news(symbol)
+        ))
+
+    app = current_app._get_current_object()
+    key = g.get('rate_limit_key')
+    pool = dashboard_executor()
+    started = time.monotonic()
+    futures = {
+        part: pool.submit(run_with_app, app, key, fn)
+        for part, fn in (('candles', candles_part), ('company', company_part), ('news', news_part))
+    }
+
+    results, errors = {}, {}
+    for part, future in futures.items():
+        # Deadlines run from the start of the request, so waiting on one part never extends another's
+        remaining = Config.DASHBOARD_TIMEOUTS[part] - (time.monotonic() - started)
+        try:
+            results[part] = future.result(timeout=max(0.0, remaining))
+        except FutureTimeout:
+            errors[part] = 'Timed out'
+        except RateLimitExceeded:
+            errors[part] = 'Rate limit exceeded'
+        except LookupError as e:
+            errors[part] = str(e)
+        except Exception as e:
+            logger.error(f"Dashboard {part} failed for {symbol}: {str(e)}")
+            errors[part] = str(e)
+
+    candles, metrics = results.pop('candles', (None, None))
+    if 'candles' in errors:
+        errors['metrics'] = errors['candles']
+    body = {
+        'symbol': symbol,
+        'period': period,
+        'interval': interval,
+        'candles': candles,
+        'metrics': metrics,
+        'company': results.get('company'),
+        'news': results.get('news'),
+        'errors': errors
+    }
+    return jsonify(body), 200 if len(errors) < len(futures) else 502
+
+@api.route('/company/<symbol>')
+@rate_limited
 @handle_api_errors
 def get_company_info(symbol):
     """Get basic company information"""
     symbol = validate_symbol(symbol)
     
-    logger.info(f"Fetching company info for {symbol}")
-    
     try:
-        ticker = yf.Ticker(symbol)
-        info = ticker.info
-        
-        company_data = {
-            'symbol': symbol,
-            'companyName': info.get('longName', symbol),
-            'sector': info.get('sector', 'Unknown'),
-            'industry': info.get('industry', 'Unknown'),
-            'website': info.get('website', ''),
-            'description': info.get('longBusinessSummary', '')[:500],  # Limit description length
-            'marketCap': info.get('marketCap', 0),
-            'image': f"https://logo.clearbit.com/{info.get('website', '').replace('https://', '').replace('http://', '').split('/')[0]}" if info.get('website') else None
-        }
-        
-        return jsonify(company_data)
+        body = shared_cache().get_or_load(
+            f'company:{symbol}', Config.CACHE_TTL_COMPANY, lambda: load_company_info(symbol)
+        )
+        return json_response(body)
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         logger.error(f"Error fetching company info for {symbol}: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/news/<symbol>')
+@api.route('/news/<symbol>')
+@rate_limited
 @handle_api_errors
 def get_company_news(symbol):
     """Get recent news for a company"""
     symbol = validate_symbol(symbol)
     
-    logger.info(f"Fetching news for {symbol}")
-    
     try:
-        ticker = yf.Ticker(symbol)
-        news = ticker.news
-        
-        # Format news data
-        formatted_news = []
-        for item in news[:8]:  # Limit to 8 most recent
-            formatted_news.append({
-                'title': item.get('title', 'No title'),
-                'url': item.get('link', ''),
-                'publishedDate': item.get('providerPublishTime', ''),
-                'publisher': item.get('publisher', 'Unknown')
-            })
-        
-        return jsonify(formatted_news)
+        body = shared_cache().get_or_load(
+            f'news:{symbol}', Config.CACHE_TTL_NEWS, lambda: load_company_news(symbol)
+        )
+        return json_response(body)
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         logger.error(f"Error fetching news for {symbol}: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -116,4 +510,6 @@ def get_company_news(symbol):
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     host = os.environ.get('HOST', '127.0.0.1')
+    app = create_app()
+    atexit.register(final_snapshot, app)
     app.run(debug=True, host=host, port=port)
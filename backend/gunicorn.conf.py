@@ -0,0 +1,29 @@
+"""
+gunicorn.conf.py
+Production server settings. Run from backend/:
+    gunicorn -c gunicorn.conf.py "app:create_app()"
+"""
+
+import gc
+import os
+import multiprocessing
+
+bind = f"{os.environ.get('HOST', '127.0.0.1')}:{os.environ.get('PORT', 5000)}"
+# The default loopback bind means a reverse proxy sits in front; trust its X-Forwarded-For
+if bind.startswith('127.0.0.1:'):
+    os.environ.setdefault('TRUSTED_PROXIES', '1')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+
+# Build the app once in the master so workers fork with every module already loaded
+preload_app = True
+os.environ.setdefault('PRELOAD_HEAVY_IMPORTS', '1')
+
+def pre_fork(server, worker):
+    # Move preloaded objects out of the collector's reach; otherwise the first
+    # collection in each worker touches their refcounts and un-shares the pages.
+    gc.freeze()
+
+def on_exit(server):
+    # Every worker has stopped; persist the cache so the next boot starts warm
+    from cache_snapshot import final_snapshot
+    final_snapshot(server.app.wsgi())
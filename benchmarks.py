@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Performance benchmarks for Pixel Trader
+
+Usage: python benchmarks.py [name ...]
+"""
+
+import os
+import sys
+import json
+import time
+import statistics
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(ROOT_DIR, 'backend')
+ARCHIVE_DIR = os.path.join(ROOT_DIR, 'archived_components')
+
+COLD_START_SCRIPT = """
+import time, sys, json
+start = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+client = create_app().test_client()
+response = client.get('/api/health')
+done = time.perf_counter()
+assert response.status_code == 200
+print(json.dumps({
+    'import': imported - start,
+    'first_health': done - start,
+    'yfinance_loaded': 'yfinance' in sys.modules,
+    'numpy_loaded': 'numpy' in sys.modules
+}))
+"""
+
+def benchmark_cold_start(runs: int = 5):
+    """Cold-start time from a fresh interpreter to the first /api/health response"""
+    print("\n🚀 Cold Start Benchmark...")
+
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-c', COLD_START_SCRIPT],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        )
+        samples.append(json.loads(result.stdout.strip().splitlines()[-1]))
+
+    import_ms = statistics.median(s['import'] for s in samples) * 1000
+    health_ms = statistics.median(s['first_health'] for s in samples) * 1000
+    print(f"✅ Import app module: {import_ms:.1f} ms (median of {runs})")
+    print(f"✅ First /api/health: {health_ms:.1f} ms (median of {runs})")
+
+    last = samples[-1]
+    if last['yfinance_loaded'] or last['numpy_loaded']:
+        print("❌ Heavy modules were imported before the first health check")
+    else:
+        print("✅ yfinance and numpy stay unloaded until a data endpoint needs them")
+    return health_ms
+
+def benchmark_arbitrage(tickers: int = 10_000, sources: int = 4, ticks: int = 50):
+    """Per-tick cost of all-pairs detection over an aligned price matrix"""
+    print(f"\n📊 Arbitrage Detection Benchmark ({tickers:,} tickers x {sources} sources)...")
+    sys.path.insert(0, ARCHIVE_DIR)
+    import numpy as np
+    from arbitrage_logic import PriceMatrix, detect_arbitrage_matrix
+
+    rng = np.random.default_rng(42)
+    names = [f'T{i:05d}' for i in range(tickers)]
+    book = PriceMatrix(names, [f'Broker{i}' for i in range(sources)])
+    base = rng.uniform(10, 500, tickers)
+
+    samples, hits = [], 0
+    for _ in range(ticks):
+        for source in book.sources:
+            quotes = base * (1 + rng.normal(0, 0.001, tickers))
+            quotes[rng.random(tickers) < 0.01] = np.nan  # ~1% missing quotes
+            book.update_row(source, quotes)
+        start = time.perf_counter()
+        opps = detect_arbitrage_matrix(book.prices, book.tickers, book.sources, 0.005)
+        samples.append(time.perf_counter() - start)
+        hits += len(opps)
+
+    tick_ms = statistics.median(samples) * 1000
+    print(f"✅ Median tick: {tick_ms:.2f} ms ({hits / ticks:.1f} opportunities per tick)")
+    return tick_ms
+
+def benchmark_synthetic_feed(tickers: int = 5_000, sources: int = 3, ticks: int = 200):
+    """Quote generation throughput of the vectorized synthetic market"""
+    print(f"\n🎲 Synthetic Feed Benchmark ({tickers:,} tickers x {sources} sources)...")
+    sys.path.insert(0, ARCHIVE_DIR)
+    from data_stream import SyntheticMarket
+
+    market = SyntheticMarket(
+        tickers, [f'Broker{i}' for i in range(sources)], seed=7,
+        spread_prob=0.001, outage_prob=0.01
+    )
+    start = time.perf_counter()
+    for _ in range(ticks):
+        market.step()
+    elapsed = time.perf_counter() - start
+
+    quotes_per_sec = ticks * tickers * sources / elapsed
+    print(f"✅ {ticks / elapsed:,.0f} ticks/s ({quotes_per_sec / 1e6:.1f}M quotes/s)")
+    return quotes_per_sec
+
+def benchmark_sharded_simulation(tickers: int = 20_000, sources: int = 3, ticks: int = 200):
+    """Simulation throughput as the ticker universe is sharded across more processes"""
+    print(f"\n🧵 Sharded Simulation Benchmark ({tickers:,} tickers x {sources} sources)...")
+    sys.path.insert(0, ARCHIVE_DIR)
+    from sharded_simulator import ShardedSimulator
+
+    cores = os.cpu_count() or 1
+    counts = sorted({1, 2, 4, 8, 16, 32, cores} & set(range(1, cores + 1)))
+    baseline = None
+    for workers in counts:
+        sim = ShardedSimulator(
+            tickers, [f'Broker{i}' for i in range(sources)], workers=workers,
+            seed=11, spread_prob=0.0005
+        )
+        stats = sim.run(ticks)
+        rate = stats['quotes_per_sec']
+        baseline = baseline or rate
+        print(f"✅ {workers:>2} workers: {rate / 1e6:6.1f}M quotes/s "
+              f"({rate / baseline:.1f}x, {stats['opportunities']:,} opportunities)")
+    return baseline
+
+def benchmark_replay(tickers: int = 2_000, sources: int = 3, ticks: int = 2_000):
+    """Replay speed over a recorded tape versus the live simulator's one-tick-per-second pace"""
+    print(f"\n⏩ Replay Benchmark ({ticks:,} ticks x {tickers:,} tickers x {sources} sources)...")
+    sys.path.insert(0, ARCHIVE_DIR)
+    import tempfile
+    from data_stream import SyntheticMarket
+    from replay import ReplayEngine, record_market, sweep_thresholds
+
+    with tempfile.TemporaryDirectory() as directory:
+        market = SyntheticMarket(tickers, [f'Broker{i}' for i in range(sources)], seed=3, spread_prob=0.0005)
+        record_market(market, ticks, directory)
+
+        stats = ReplayEngine(directory, 0.005).run()
+        print(f"✅ Replay: {stats['ticks_per_sec']:,.0f} ticks/s "
+              f"({stats['ticks_per_sec']:,.0f}x real time at 1 tick/s, {stats['opportunities']:,} opportunities)")
+
+        start = time.perf_counter()
+        results = sweep_thresholds(directory, [0.002, 0.005, 0.01, 0.02])
+        elapsed = time.perf_counter() - start
+        print(f"✅ Threshold sweep: {len(results)} replays in {elapsed:.2f}s")
+    return stats['ticks_per_sec']
+
+def _records_size(records) -> int:
+    """Deep size of a list of per-bar dicts; the shared key strings are not counted"""
+    size = sys.getsizeof(records)
+    for record in records:
+        size += sys.getsizeof(record)
+        size += sum(sys.getsizeof(value) for value in record.values())
+    return size
+
+def benchmark_candle_memory(sizes=(1_000, 100_000, 1_000_000)):
+    """Memory per bar of the DataFrame and per-bar dicts versus the columnar candle series"""
+    print("\n🧮 Candle Memory Benchmark...")
+    import numpy as np
+    import pandas as pd
+    from candles import candles_from_frame, candles_to_records
+
+    rng = np.random.default_rng(5)
+    print(f"{'bars':>10} {'DataFrame':>11} {'dicts':>11} {'series f64':>11} {'series f32':>11} {'range slice':>12}")
+    for n in sizes:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, n)))
+        frame = pd.DataFrame({
+            'Open': close * (1 + rng.normal(0, 0.0005, n)),
+            'High': close * 1.002,
+            'Low': close * 0.998,
+            'Close': close,
+            'Volume': rng.integers(1_000, 100_000, n)
+        }, index=pd.date_range('2020-01-01', periods=n, freq='min'))
+
+        candles = candles_from_frame(frame)
+        compact = candles_from_frame(frame, np.float32)
+        frame_bytes = int(frame.memory_usage(deep=True).sum())
+        records_bytes = _records_size(candles_to_records(candles))
+
+        # A time-range slice is two binary searches and six views, whatever the length
+        lo, hi = int(candles.time[n // 4]), int(candles.time[n // 2])
+        start = time.perf_counter()
+        for _ in range(10_000):
+            candles.between(lo, hi)
+        slice_us = (time.perf_counter() - start) / 10_000 * 1e6
+
+        print(f"{n:>10,} {frame_bytes / n:>9.0f} B {records_bytes / n:>9.0f} B "
+              f"{candles.nbytes / n:>9.0f} B {compact.nbytes / n:>9.0f} B {slice_us:>9.1f} µs")
+    return records_bytes / candles.nbytes
+
+BENCHMARKS = {
+    'cold_start': benchmark_cold_start,
+    'arbitrage': benchmark_arbitrage,
+    'synthetic_feed': benchmark_synthetic_feed,
+    'sharded_simulation': benchmark_sharded_simulation,
+    'replay': benchmark_replay,
+    'candle_memory': benchmark_candle_memory,
+}
+
+def main():
+    names = sys.argv[1:] or list(BENCHMARKS)
+    print("⚡ Pixel Trader Benchmarks")
+    print("=" * 50)
+    for name in names:
+        BENCHMARKS[name]()
+
+if __name__ == "__main__":
+    main()
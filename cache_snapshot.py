@@ -0,0 +1,197 @@
+"""
+cache_snapshot.py
+Durable snapshots of the shared cache so a restarted backend boots warm
+"""
+
+import os
+import mmap
+import time
+import zlib
+import struct
+import logging
+import threading
+from typing import Iterator, Optional, Tuple
+from shared_cache import SharedCache
+
+logger = logging.getLogger(__name__)
+
+# File layout (little-endian):
+#   header: magic, format version, reserved, entry count, created (epoch), crc32
+#   entries: expires (epoch), key length, value length, key bytes, value bytes
+# The crc32 covers the entries followed by every header field before it.
+SNAPSHOT_MAGIC = b'PTCACHE\0'
+SNAPSHOT_VERSION = 2
+HEADER = struct.Struct('<8sIIQdI')
+HEADER_FIELDS = struct.Struct('<8sIIQd')
+ENTRY = struct.Struct('<dII')
+SNAPSHOT_LEASE = 'snapshot'
+
+def write_snapshot(cache: SharedCache, path: str) -> int:
+    """
+    Write every entry still within the cache's stale grace to path. The file
+    is built next to the target, fsynced and renamed over it, so a crash never
+    leaves a half-written snapshot. Returns the number of entries written.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    count, crc = 0, 0
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(bytes(HEADER.size))
+            for key, value, expires in cache.iter_entries(time.time() - cache.stale_grace):
+                encoded = key.encode()
+                record = ENTRY.pack(expires, len(encoded), len(value))
+                for chunk in (record, encoded, value):
+                    f.write(chunk)
+                    crc = zlib.crc32(chunk, crc)
+                count += 1
+            fields = (SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 0, count, time.time())
+            crc = zlib.crc32(HEADER_FIELDS.pack(*fields), crc)
+            f.seek(0)
+            f.write(HEADER.pack(*fields, crc))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return count
+
+def _read_entries(view: memoryview, count: int) -> Iterator[Tuple[str, memoryview, float]]:
+    offset = HEADER.size
+    for _ in range(count):
+        if offset + ENTRY.size > len(view):
+            raise ValueError('Snapshot is truncated')
+        expires, key_len, value_len = ENTRY.unpack_from(view, offset)
+        offset += ENTRY.size
+        if offset + key_len + value_len > len(view):
+            raise ValueError('Snapshot is truncated')
+        key = bytes(view[offset:offset + key_len]).decode()
+        offset += key_len
+        yield key, view[offset:offset + value_len], expires
+        offset += value_len
+    if offset != len(view):
+        raise ValueError('Snapshot has trailing bytes')
+
+def restore_snapshot(cache: SharedCache, path: str) -> int:
+    """
+    Memory-map a snapshot and merge it into the cache: values are handed to
+    SQLite straight from the map, and entries past the stale grace are
+    skipped. Raises ValueError for a corrupt, truncated or foreign file.
+    """
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < HEADER.size:
+            raise ValueError('Snapshot is truncated')
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                magic, version, _, count, created, crc = HEADER.unpack_from(view)
+                if magic != SNAPSHOT_MAGIC:
+                    raise ValueError('Not a cache snapshot')
+                if version != SNAPSHOT_VERSION:
+                    raise ValueError(f'Unsupported snapshot version: {version}')
+                if zlib.crc32(view[:HEADER_FIELDS.size], zlib.crc32(view[HEADER.size:])) != crc:
+                    raise ValueError('Snapshot checksum mismatch')
+                if count > (size - HEADER.size) // ENTRY.size:
+                    raise ValueError('Snapshot entry count exceeds the file size')
+                cutoff = time.time() - cache.stale_grace
+                entries = list(_read_entries(view, count))
+                try:
+                    restored = cache.merge(entry for entry in entries if entry[2] >= cutoff)
+                finally:
+                    # The map cannot close while slices of it are still exported
+                    for _, value, _ in entries:
+                        value.release()
+            finally:
+                view.release()
+    logger.info(f'Restored {restored} cache entries from snapshot taken at {time.ctime(created)}')
+    return restored
+
+def snapshot_if_due(cache: SharedCache, path: str, interval: float) -> bool:
+    """Snapshot unless another worker is doing it or did it within the interval"""
+    with cache.lease(SNAPSHOT_LEASE) as acquired:
+        if not acquired:
+            return False
+        try:
+            if time.time() - os.path.getmtime(path) < interval * 0.9:
+                return False
+        except OSError:
+            pass
+        count = write_snapshot(cache, path)
+    logger.info(f'Snapshotted {count} cache entries to {path}')
+    return True
+
+def restore_if_empty(cache: SharedCache, path: str) -> int:
+    """Warm an empty cache (e.g. a fresh /dev/shm after a reboot) from the last snapshot"""
+    if not os.path.exists(path):
+        return 0
+    with cache.lease(SNAPSHOT_LEASE) as acquired:
+        if not acquired or not cache.is_empty():
+            return 0
+        try:
+            return restore_snapshot(cache, path)
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning(f'Ignoring cache snapshot {path}: {e}')
+            return 0
+
+class CacheSnapshotter:
+    """
+    Background thread that snapshots the cache every interval seconds. Every
+    worker runs one; the snapshot lease and file age make sure only one of
+    them writes per interval. Threads do not survive a fork, so start() is
+    called lazily from the worker that will own it.
+    """
+
+    def __init__(self, cache: SharedCache, path: str, interval: float):
+        self.cache = cache
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+
+    def start(self) -> None:
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='cache-snapshot', daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                snapshot_if_due(self.cache, self.path, self.interval)
+            except Exception as e:
+                logger.error(f'Cache snapshot failed: {e}')
+
+    def stop(self) -> None:
+        self._stop.set()
+
+def final_snapshot(app) -> None:
+    """Snapshot once on graceful shutdown, after the workers have stopped serving"""
+    path = app.config.get('CACHE_SNAPSHOT_PATH')
+    cache = app.extensions.get('shared_cache')
+    if not path or cache is None:
+        return
+    try:
+        count = write_snapshot(cache, path)
+        logger.info(f'Snapshotted {count} cache entries to {path} on shutdown')
+    except Exception as e:
+        logger.error(f'Cache snapshot on shutdown failed: {e}')
+
+def init_cache_snapshots(app, cache: SharedCache) -> Optional[CacheSnapshotter]:
+    """Restore the last snapshot into an empty cache and schedule periodic snapshots"""
+    path = app.config.get('CACHE_SNAPSHOT_PATH')
+    if not path:
+        return None
+    restore_if_empty(cache, path)
+
+    interval = app.config.get('CACHE_SNAPSHOT_INTERVAL', 0)
+    if interval <= 0:
+        return None
+    snapshotter = CacheSnapshotter(cache, path, interval)
+    app.extensions['cache_snapshotter'] = snapshotter
+    app.before_request(snapshotter.start)
+    return snapshotter
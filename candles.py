@@ -0,0 +1,148 @@
+"""
+candles.py
+Columnar candle series used by the cache, indicators, metrics and the candles endpoint
+"""
+
+import struct
+from typing import Iterator, List, Optional, Tuple
+import numpy as np
+
+# Packed layout: header, then whole columns back to back. The 8-byte columns
+# (time, volume) come first so every column starts suitably aligned for a
+# zero-copy np.frombuffer view, whichever price width is used.
+PACK_MAGIC = b'CSv2'
+PACK_HEADER = struct.Struct('<4sB3xQ')
+PRICE_FIELDS = ('open', 'high', 'low', 'close')
+PRICE_DTYPES = {8: np.dtype('<f8'), 4: np.dtype('<f4')}
+
+class CandleSeries:
+    """
+    OHLCV bars as contiguous columns: int64 `time` (the bar's exchange-local
+    wall clock in epoch seconds, ascending), float64 or float32 prices and
+    int64 volume. That is 48 bytes a bar at float64 and 32 at float32.
+    Slicing by position or by time range returns views, never copies.
+    """
+
+    __slots__ = ('time', 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, time, open, high, low, close, volume):
+        self.time = time
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    @classmethod
+    def empty(cls, price_dtype=np.float64) -> 'CandleSeries':
+        prices = [np.empty(0, dtype=price_dtype) for _ in PRICE_FIELDS]
+        return cls(np.empty(0, dtype=np.int64), *prices, np.empty(0, dtype=np.int64))
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def __getitem__(self, key) -> 'CandleSeries':
+        if not isinstance(key, slice):
+            raise TypeError('CandleSeries only supports slicing; use rows() for single bars')
+        return CandleSeries(*(getattr(self, name)[key] for name in self.__slots__))
+
+    @property
+    def price_dtype(self) -> np.dtype:
+        return self.close.dtype
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in self.__slots__)
+
+    def between(self, start: Optional[int] = None, end: Optional[int] = None) -> 'CandleSeries':
+        """Bars with start <= time < end, found by binary search; either bound may be None"""
+        lo = 0 if start is None else int(self.time.searchsorted(start, 'left'))
+        hi = len(self) if end is None else int(self.time.searchsorted(end, 'left'))
+        return self[lo:hi]
+
+    def since(self, start: int) -> 'CandleSeries':
+        return self.between(start)
+
+    def rows(self) -> Iterator[Tuple[int, float, float, float, float, int]]:
+        """(time, open, high, low, close, volume) tuples, for per-bar consumers like indicators"""
+        return zip(
+            self.time.tolist(),
+            self.open.tolist(),
+            self.high.tolist(),
+            self.low.tolist(),
+            self.close.tolist(),
+            self.volume.tolist()
+        )
+
+    def tobytes(self) -> bytes:
+        width = self.price_dtype.itemsize
+        parts = [PACK_HEADER.pack(PACK_MAGIC, width, len(self)),
+                 np.ascontiguousarray(self.time, dtype='<i8').tobytes(),
+                 np.ascontiguousarray(self.volume, dtype='<i8').tobytes()]
+        parts.extend(np.ascontiguousarray(getattr(self, name), dtype=PRICE_DTYPES[width]).tobytes()
+                     for name in PRICE_FIELDS)
+        return b''.join(parts)
+
+    @classmethod
+    def frombytes(cls, buf: bytes) -> 'CandleSeries':
+        """Read-only column views over a packed buffer; no per-bar copy is made"""
+        magic, width, n = PACK_HEADER.unpack_from(buf)
+        if magic != PACK_MAGIC or width not in PRICE_DTYPES:
+            raise ValueError('Not a packed candle series')
+        offset = PACK_HEADER.size
+        columns = {}
+        for name, dtype in (('time', '<i8'), ('volume', '<i8'), *((f, PRICE_DTYPES[width]) for f in PRICE_FIELDS)):
+            columns[name] = np.frombuffer(buf, dtype=dtype, count=n, offset=offset)
+            offset += n * columns[name].itemsize
+        return cls(**columns)
+
+def candles_from_frame(data, price_dtype=np.float64) -> CandleSeries:
+    """Convert a yfinance OHLCV DataFrame to a candle series"""
+    index = data.index
+    if getattr(index, 'tz', None) is not None:
+        index = index.tz_localize(None)
+
+    prices = [data[field.capitalize()].to_numpy(dtype=price_dtype) for field in PRICE_FIELDS]
+    if 'Volume' in data:
+        volume = np.nan_to_num(data['Volume'].to_numpy(dtype=np.float64)).astype(np.int64)
+    else:
+        volume = np.zeros(len(data), dtype=np.int64)
+    return CandleSeries(index.asi8 // 1_000_000_000, *prices, volume)
+
+def pack_candles(candles: CandleSeries) -> bytes:
+    return candles.tobytes()
+
+def unpack_candles(buf: bytes) -> CandleSeries:
+    return CandleSeries.frombytes(buf)
+
+def candles_to_records(candles: CandleSeries) -> List[dict]:
+    """Convert a candle series to the JSON shape served by /api/candles"""
+    dates = np.datetime_as_string(candles.time.astype('datetime64[s]'), unit='D').tolist()
+    return [
+        {
+            'date': date,
+            'time': date,
+            'timestamp': t,
+            'open': o,
+            'high': h,
+            'low': l,
+            'close': c,
+            'volume': v
+        }
+        for date, (t, o, h, l, c, v) in zip(dates, candles.rows())
+    ]
+
+def performance_metrics(candles: CandleSeries) -> Optional[dict]:
+    """The figures calculatePerformanceMetrics in frontend/performance.js derives, as numbers"""
+    if len(candles) < 2:
+        return None
+    first = float(candles.close[0])
+    last = float(candles.close[-1])
+    return {
+        'change': last - first,
+        'changePercent': (last - first) / first * 100 if first else 0.0,
+        'high52w': float(candles.high.max()),
+        'low52w': float(candles.low.min()),
+        'avgVolume': float(candles.volume.mean()),
+        'currentPrice': last
+    }
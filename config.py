@@ -4,6 +4,7 @@ Configuration management for Pixel Trader
 """
 
 import os
+import tempfile
 from typing import Dict, Any
 
 class Config:
@@ -14,6 +15,8 @@ class Config:
     # API settings
     API_BASE_URL = os.environ.get('API_BASE_URL', 'http://127.0.0.1:5000')
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', '*')
+    # Import yfinance/numpy in create_app (set by gunicorn.conf.py for --preload)
+    PRELOAD_HEAVY_IMPORTS = os.environ.get('PRELOAD_HEAVY_IMPORTS', '0') == '1'
     
     # Data settings
     DEFAULT_SYMBOL = os.environ.get('DEFAULT_SYMBOL', 'AAPL')
@@ -23,6 +26,54 @@ class Config:
     # Rate limiting
     RATE_LIMIT_REQUESTS = int(os.environ.get('RATE_LIMIT_REQUESTS', 100))
     RATE_LIMIT_PERIOD = int(os.environ.get('RATE_LIMIT_PERIOD', 3600))  # 1 hour
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', '1') != '0'
+    # Fraction of a full request charged when a response never reaches the upstream
+    RATE_LIMIT_CACHED_COST = float(os.environ.get('RATE_LIMIT_CACHED_COST', 0.1))
+    # Reverse proxies in front of the app whose X-Forwarded-For is trusted for the client address.
+    # Leave at 0 when clients connect directly, or anyone can pick their own rate limit bucket.
+    TRUSTED_PROXIES = int(os.environ.get('TRUSTED_PROXIES', 0))
+    # Shared by every worker on the host so limits hold across processes
+    RATE_LIMIT_STORAGE = os.environ.get(
+        'RATE_LIMIT_STORAGE',
+        os.path.join(tempfile.gettempdir(), 'pixel_trader_rate_limit.db')
+    )
+    
+    # Host-wide cache shared by all workers; tmpfs keeps it in shared memory where available
+    CACHE_PATH = os.environ.get(
+        'CACHE_PATH',
+        os.path.join('/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(),
+                     'pixel_trader_cache.db')
+    )
+    CACHE_TTL_CANDLES = int(os.environ.get('CACHE_TTL_CANDLES', 300))
+    CANDLE_PRICE_DTYPE = os.environ.get('CANDLE_PRICE_DTYPE', 'float64')  # 'float32' halves price memory (~7 significant digits)
+    CACHE_TTL_COMPANY = int(os.environ.get('CACHE_TTL_COMPANY', 86400))
+    CACHE_TTL_NEWS = int(os.environ.get('CACHE_TTL_NEWS', 900))
+    CACHE_TTL_INDICATORS = int(os.environ.get('CACHE_TTL_INDICATORS', 86400))  # streaming indicator snapshots
+    CACHE_LEASE_TIMEOUT = int(os.environ.get('CACHE_LEASE_TIMEOUT', 30))  # max seconds one worker may hold a refresh
+    CACHE_STALE_GRACE = int(os.environ.get('CACHE_STALE_GRACE', 3600))  # expired entries served while refreshing
+    # Durable copy of the cache, written periodically and on shutdown and restored into an empty cache on boot
+    CACHE_SNAPSHOT_PATH = os.environ.get(
+        'CACHE_SNAPSHOT_PATH',
+        os.path.join(os.path.expanduser('~'), '.cache', 'pixel_trader', 'cache.snapshot')
+    )
+    CACHE_SNAPSHOT_INTERVAL = int(os.environ.get('CACHE_SNAPSHOT_INTERVAL', 300))  # 0 disables periodic snapshots
+    
+    # Watchlist correlation
+    CORRELATION_MAX_SYMBOLS = int(os.environ.get('CORRELATION_MAX_SYMBOLS', 200))
+    CORRELATION_BENCHMARK = os.environ.get('CORRELATION_BENCHMARK', 'SPY')  # betas are measured against this
+    CORRELATION_FETCH_WORKERS = int(os.environ.get('CORRELATION_FETCH_WORKERS', 8))  # concurrent candle fetches per worker
+    CORRELATION_MAX_UNCACHED = int(os.environ.get('CORRELATION_MAX_UNCACHED', 20))  # upstream fetches one request may make
+    
+    # Dashboard fan-out: threads per worker and per-part deadlines in seconds
+    DASHBOARD_WORKERS = int(os.environ.get('DASHBOARD_WORKERS', 8))
+    DASHBOARD_TIMEOUTS = {
+        'candles': float(os.environ.get('DASHBOARD_TIMEOUT_CANDLES', 10)),
+        'company': float(os.environ.get('DASHBOARD_TIMEOUT_COMPANY', 5)),
+        'news': float(os.environ.get('DASHBOARD_TIMEOUT_NEWS', 5))
+    }
+    
+    # Screener
+    SCREENER_MAX_RESULTS = int(os.environ.get('SCREENER_MAX_RESULTS', 500))
     
     # Validation
     MAX_SYMBOL_LENGTH = 10
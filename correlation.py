@@ -0,0 +1,135 @@
+"""
+correlation.py
+Aligned log returns, covariance/correlation matrices and rolling betas for a set of symbols
+"""
+
+from typing import Dict, Optional, Tuple
+import numpy as np
+from candles import CandleSeries
+
+# Pairs with fewer overlapping returns than this get no correlation
+MIN_OVERLAP = 3
+
+def align_closes(series: Dict[str, CandleSeries]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Put each symbol's closes on the union of all bar times.
+    Returns (times, closes) with closes shaped (bars, symbols) and NaN where a
+    symbol has no bar, e.g. a holiday on one exchange or a late listing.
+    """
+    arrays = list(series.values())
+    times = np.unique(np.concatenate([candles.time for candles in arrays]))
+    closes = np.full((len(times), len(arrays)), np.nan)
+    for column, candles in enumerate(arrays):
+        closes[times.searchsorted(candles.time), column] = candles.close
+    return times, closes
+
+def log_returns(closes: np.ndarray) -> np.ndarray:
+    """
+    Log returns per column. A return is taken against the symbol's previous
+    available close, so a missing bar widens the next return instead of
+    dropping two; bars with no close stay NaN.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        logs = np.log(closes)
+    valid = np.isfinite(logs)
+    rows = np.arange(len(logs))[:, None]
+    # Forward-fill by carrying the row index of the last valid close down each column
+    last = np.maximum.accumulate(np.where(valid, rows, -1), axis=0)
+    previous = np.full_like(logs, np.nan)
+    previous[1:] = np.take_along_axis(logs, np.maximum(last[:-1], 0), axis=0)
+    previous[1:][last[:-1] < 0] = np.nan
+    returns = logs - previous
+    returns[~valid] = np.nan
+    return returns
+
+def covariance_matrices(returns: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pairwise-complete sample covariance and correlation: each pair uses every
+    bar where both symbols have a return. All sums are matrix products, so the
+    whole matrix costs a handful of BLAS calls.
+    """
+    valid = np.isfinite(returns)
+    mask = valid.astype(np.float64)
+    x = np.where(valid, returns, 0.0)
+
+    n = mask.T @ mask
+    sum_i = x.T @ mask            # sum of i's returns over bars where j is also present
+    sum_j = sum_i.T
+    sum_ij = x.T @ x
+    sq_i = (x * x).T @ mask
+    sq_j = sq_i.T
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = (sum_ij - sum_i * sum_j / n) / (n - 1)
+        var_i = (sq_i - sum_i * sum_i / n) / (n - 1)
+        var_j = (sq_j - sum_j * sum_j / n) / (n - 1)
+        corr = cov / np.sqrt(var_i * var_j)
+    too_short = n < MIN_OVERLAP
+    cov[too_short] = np.nan
+    corr[too_short] = np.nan
+    np.clip(corr, -1.0, 1.0, out=corr)
+    return cov, corr
+
+def rolling_betas(returns: np.ndarray, benchmark: np.ndarray, window: int) -> np.ndarray:
+    """
+    Beta of every column against the benchmark returns over a trailing window,
+    from windowed differences of cumulative sums. A beta needs at least half
+    the window (and MIN_OVERLAP) of bars where both returns exist.
+    """
+    valid = np.isfinite(returns) & np.isfinite(benchmark)[:, None]
+    x = np.where(valid, returns, 0.0)
+    b = np.where(valid, benchmark[:, None], 0.0)
+
+    def windowed(values: np.ndarray) -> np.ndarray:
+        totals = np.cumsum(values, axis=0)
+        totals[window:] -= totals[:-window].copy()
+        return totals
+
+    n = windowed(valid.astype(np.float64))
+    sum_x = windowed(x)
+    sum_b = windowed(b)
+    sum_xb = windowed(x * b)
+    sum_bb = windowed(b * b)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        betas = (sum_xb - sum_x * sum_b / n) / (sum_bb - sum_b * sum_b / n)
+    betas[n < max(MIN_OVERLAP, window // 2)] = np.nan
+    betas[~np.isfinite(betas)] = np.nan
+    return betas
+
+def _to_lists(values: np.ndarray, decimals: int = 6) -> list:
+    """NaN becomes null so the result is valid JSON"""
+    rounded = np.round(values, decimals).astype(object)
+    rounded[np.isnan(values)] = None
+    return rounded.tolist()
+
+def returns_matrix(
+    series: Dict[str, CandleSeries],
+    window: int = 20,
+    benchmark: Optional[CandleSeries] = None
+) -> dict:
+    """Everything the correlation endpoint serves for a set of candle series"""
+    symbols = list(series)
+    if benchmark is not None:
+        series = {**series, '\0benchmark': benchmark}
+    times, closes = align_closes(series)
+    returns = log_returns(closes)
+    if benchmark is not None:
+        benchmark_returns = returns[:, -1]
+        returns = returns[:, :-1]
+    # The first row can never hold a return
+    times, returns = times[1:], returns[1:]
+    cov, corr = covariance_matrices(returns)
+    # Daily and longer bars sit on midnight; only intraday dates need a time of day
+    unit = 'D' if not (times % 86400).any() else 'm'
+
+    result = {
+        'symbols': symbols,
+        'dates': np.datetime_as_string(times.astype('datetime64[s]'), unit=unit).tolist(),
+        'returns': _to_lists(returns),
+        'covariance': _to_lists(cov, 10),
+        'correlation': _to_lists(corr),
+        'window': window
+    }
+    if benchmark is not None:
+        result['betas'] = _to_lists(rolling_betas(returns, benchmark_returns[1:], window))
+    return result
@@ -6,69 +6,244 @@ Demo backend with mock data for Pixel Trader demonstration
 import os
 import sys
 import json
-from datetime import datetime, timedelta
-import random
+import zlib
+import time
+import bisect
+import threading
+from datetime import datetime
+from functools import lru_cache
+import numpy as np
 from flask import Flask, jsonify, request
 from flask_cors import CORS
+from config import Config
+from candles import CandleSeries
+from indicators import IndicatorSeries, parse_indicator_spec
+from archived_components.data_stream import SyntheticMarket
 
 app = Flask(__name__)
 CORS(app)
 
-def generate_mock_data(symbol, days=30):
-    """Generate realistic mock stock data"""
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=days)
-    
-    # Base prices for different stocks
-    base_prices = {
-        'AAPL': 180.0,
-        'MSFT': 350.0,
-        'GOOGL': 130.0,
-        'TSLA': 200.0,
-        'AMZN': 140.0,
-        'NVDA': 900.0,
-        'META': 320.0,
-        'NFLX': 400.0
+# Bars per lazily generated chunk; chunks are cached and reused across requests
+CHUNK_BARS = 4096
+# Anchor date where every symbol trades at its base price
+REFERENCE_EPOCH = int(datetime(2025, 1, 1).timestamp())
+MAX_HISTORY_DAYS = 20 * 365
+ANNUAL_VOLATILITY = 0.3
+# Spread of the anchors' log price around the base price, however long the history
+LONG_RUN_VOLATILITY = 0.5
+YEAR_SECONDS = 365 * 86400
+# Largest series one response may build (e.g. max/1m would be ~10M bars)
+MAX_BARS = int(os.environ.get('DEMO_MAX_BARS', 200_000))
+# Ticks per second of the synthetic feed revising the still-forming last bar; 0 keeps it fixed
+LIVE_TICK_RATE = float(os.environ.get('DEMO_LIVE_TICK_RATE', 2.0))
+# Longer bars get fewer, longer ticks so a first request late in a daily bar stays cheap
+MAX_LIVE_TICKS = 2000
+MAX_LIVE_BARS = 1024
+
+INTERVAL_SECONDS = {
+    '1m': 60, '2m': 120, '5m': 300, '15m': 900, '30m': 1800,
+    '60m': 3600, '90m': 5400, '1h': 3600,
+    '1d': 86400, '5d': 5 * 86400, '1wk': 7 * 86400,
+    '1mo': 30 * 86400, '3mo': 91 * 86400
+}
+PERIOD_DAYS = {
+    '1d': 1, '5d': 5, '1mo': 30, '3mo': 90, '6mo': 180,
+    '1y': 365, '2y': 730, '5y': 1825, '10y': 3650, 'max': MAX_HISTORY_DAYS
+}
+
+# Base prices for different stocks
+BASE_PRICES = {
+    'AAPL': 180.0,
+    'MSFT': 350.0,
+    'GOOGL': 130.0,
+    'TSLA': 200.0,
+    'AMZN': 140.0,
+    'NVDA': 900.0,
+    'META': 320.0,
+    'NFLX': 400.0
+}
+
+def symbol_seed(symbol, interval, *parts):
+    """Stable seed for a symbol and interval (Python's hash() is randomized per process)"""
+    return [zlib.crc32(f'{symbol}:{interval}'.encode()), *parts]
+
+@lru_cache(maxsize=256)
+def anchor_levels(symbol, interval, chunks):
+    """
+    Log price at the start of each chunk, for chunk offsets -chunks..chunks
+    around the reference date. The anchors follow a mean-reverting walk whose
+    long-run spread is LONG_RUN_VOLATILITY, so decades of history stay in a
+    plausible range.
+    """
+    step = ANNUAL_VOLATILITY * np.sqrt(INTERVAL_SECONDS[interval] * CHUNK_BARS / YEAR_SECONDS)
+    step = min(step, LONG_RUN_VOLATILITY)
+    persistence = np.sqrt(1 - (step / LONG_RUN_VOLATILITY) ** 2)
+    levels = np.zeros(2 * chunks + 1)
+    for direction, stream in ((1, 0), (-1, 1)):
+        shocks = np.random.default_rng(symbol_seed(symbol, interval, stream)).normal(0, step, chunks)
+        level = 0.0
+        for i, shock in enumerate(shocks, start=1):
+            level = level * persistence + shock
+            levels[chunks + direction * i] = level
+    return np.log(BASE_PRICES.get(symbol, 100.0)) + levels
+
+def anchor_range(interval):
+    """Chunk offsets covered by anchor_levels for an interval"""
+    bars = (MAX_HISTORY_DAYS + 366) * 86400 // INTERVAL_SECONDS[interval]
+    return bars // CHUNK_BARS + 2
+
+@lru_cache(maxsize=512)
+def generate_chunk(symbol, interval, chunk):
+    """
+    Generate one chunk of bars, vectorized. The close path is a Brownian bridge
+    between the chunk's two anchors, so chunks join up without generating their
+    neighbours and the same symbol always gets the same bars.
+    """
+    seconds = INTERVAL_SECONDS[interval]
+    chunks = anchor_range(interval)
+    levels = anchor_levels(symbol, interval, chunks)
+    start_level = levels[chunks + chunk]
+    end_level = levels[chunks + chunk + 1]
+
+    rng = np.random.default_rng(symbol_seed(symbol, interval, 2, chunk + chunks))
+    sigma = ANNUAL_VOLATILITY * np.sqrt(seconds / YEAR_SECONDS)
+    walk = np.cumsum(rng.normal(0, sigma, CHUNK_BARS))
+    weights = np.arange(1, CHUNK_BARS + 1) / CHUNK_BARS
+    log_close = start_level + walk - weights * walk[-1] + weights * (end_level - start_level)
+
+    close = np.exp(log_close)
+    previous = np.concatenate(([np.exp(start_level)], close[:-1]))
+    open_ = previous * (1 + rng.normal(0, sigma / 4, CHUNK_BARS))
+    wick = np.abs(rng.normal(0, sigma / 2, (2, CHUNK_BARS)))
+    high = np.maximum(open_, close) * (1 + wick[0])
+    low = np.minimum(open_, close) * (1 - wick[1])
+    volume = (rng.lognormal(0, 0.5, CHUNK_BARS) * 5e7 * min(1.0, seconds / 86400)).astype(np.int64)
+
+    first_bar = REFERENCE_EPOCH // seconds + chunk * CHUNK_BARS
+    times = (first_bar + np.arange(CHUNK_BARS)) * seconds
+    bars = {
+        'time': times,
+        'open': np.round(open_, 2),
+        'high': np.round(high, 2),
+        'low': np.round(low, 2),
+        'close': np.round(close, 2),
+        'volume': volume
+    }
+    for values in bars.values():
+        values.flags.writeable = False  # shared by every request hitting this chunk
+    return bars
+
+_live_bars = {}
+_live_lock = threading.Lock()
+
+def live_bar(symbol, interval, bar_time, open_price, now):
+    """
+    (high, low, close) of the still-forming bar so far. A SyntheticMarket seeded
+    per symbol and bar walks the price from the bar's open, one tick per
+    1 / LIVE_TICK_RATE seconds of wall time, and each request folds in the
+    ticks since the last one, so refreshes see the live bar revised like a real feed.
+    """
+    seconds = INTERVAL_SECONDS[interval]
+    ticks_per_bar = max(1, min(int(seconds * LIVE_TICK_RATE), MAX_LIVE_TICKS))
+    ticks = min(int((now - bar_time) * ticks_per_bar / seconds), ticks_per_bar)
+    key = (symbol, interval)
+    with _live_lock:
+        state = _live_bars.get(key)
+        if state is None or state['time'] != bar_time:
+            if len(_live_bars) >= MAX_LIVE_BARS:
+                _live_bars.clear()
+            market = SyntheticMarket(
+                [symbol], sources=('demo',), seed=symbol_seed(symbol, interval, 3, bar_time),
+                volatility=ANNUAL_VOLATILITY * np.sqrt(seconds / ticks_per_bar / YEAR_SECONDS),
+                market_beta=0.0
+            )
+            market.true_prices[:] = open_price
+            state = _live_bars[key] = {
+                'time': bar_time, 'market': market, 'ticks': 0,
+                'high': open_price, 'low': open_price, 'close': open_price
+            }
+        if ticks > state['ticks']:
+            bar = state['market'].bar(ticks - state['ticks'])
+            state['ticks'] = ticks
+            state['high'] = max(state['high'], float(bar['high'][0]))
+            state['low'] = min(state['low'], float(bar['low'][0]))
+            state['close'] = float(bar['close'][0])
+        return state['high'], state['low'], state['close']
+
+def mock_columns(symbol, period='1mo', interval='1d', now=None):
+    """
+    Deterministic mock bars for any period and interval as numpy columns: the
+    bar grid is fixed to the interval, so the same request always returns the
+    same data, apart from the still-forming last bar, which a synthetic feed
+    revises as time passes (see live_bar). Raises ValueError for a series
+    longer than MAX_BARS.
+    """
+    seconds = INTERVAL_SECONDS[interval]
+    now = int(now if now is not None else time.time())
+    if period == 'ytd':
+        start = int(datetime(datetime.fromtimestamp(now).year, 1, 1).timestamp())
+    else:
+        start = now - PERIOD_DAYS.get(period, 30) * 86400
+
+    reference_bar = REFERENCE_EPOCH // seconds
+    first = -(-start // seconds) - reference_bar
+    last = now // seconds - reference_bar
+    if last < first:
+        first = last
+    if last - first + 1 > MAX_BARS:
+        raise ValueError(
+            f'{period} of {interval} bars is {last - first + 1:,} bars (max {MAX_BARS:,}); use a longer interval'
+        )
+
+    first_chunk, last_chunk = first // CHUNK_BARS, last // CHUNK_BARS
+    parts = {field: [] for field in ('time', 'open', 'high', 'low', 'close', 'volume')}
+    for chunk in range(first_chunk, last_chunk + 1):
+        bars = generate_chunk(symbol.upper(), interval, chunk)
+        lo = max(first - chunk * CHUNK_BARS, 0)
+        hi = min(last - chunk * CHUNK_BARS, CHUNK_BARS - 1) + 1
+        for field, values in bars.items():
+            parts[field].append(values[lo:hi])
+    columns = {field: np.concatenate(values) for field, values in parts.items()}
+
+    # The last bar on the grid is the one containing `now`
+    if LIVE_TICK_RATE > 0 and len(columns['time']):
+        bar_time = int(columns['time'][-1])
+        high, low, close = live_bar(symbol.upper(), interval, bar_time, float(columns['open'][-1]), now)
+        columns['high'][-1] = round(high, 2)
+        columns['low'][-1] = round(low, 2)
+        columns['close'][-1] = round(close, 2)
+        columns['volume'][-1] = int(columns['volume'][-1] * min(1.0, (now - bar_time + 1) / seconds))
+    return columns
+
+def generate_mock_data(symbol, period='1mo', interval='1d', now=None):
+    """Mock bars as records shaped like the real backend's, epoch `timestamp` included"""
+    seconds = INTERVAL_SECONDS[interval]
+    columns = mock_columns(symbol, period, interval, now)
+    unit = 'D' if seconds >= 86400 else 'm'
+    dates = np.datetime_as_string(columns['time'].astype('datetime64[s]'), unit=unit).tolist()
+    return [
+        {'date': d, 'time': d, 'timestamp': t, 'open': o, 'high': h, 'low': l, 'close': c, 'volume': v}
+        for d, t, o, h, l, c, v in zip(
+            dates,
+            columns['time'].tolist(),
+            columns['open'].tolist(),
+            columns['high'].tolist(),
+            columns['low'].tolist(),
+            columns['close'].tolist(),
+            columns['volume'].tolist()
+        )
+    ]
+
+def candles_payload(data, since=None):
+    """Every bar, or with `since` the delta a client cache merges in (as in backend/app.py)"""
+    if since is None:
+        return data
+    start = bisect.bisect_left([bar['timestamp'] for bar in data], since)
+    return {
+        'candles': data[start:],
+        'start': data[0]['timestamp'] if data else None,
+        'length': len(data)
     }
-    
-    base_price = base_prices.get(symbol.upper(), 100.0)
-    current_price = base_price
-    
-    data = []
-    current_date = start_date
-    
-    for day in range(days):
-        # Simulate daily price movement
-        daily_change = random.uniform(-0.05, 0.05)  # -5% to +5%
-        current_price *= (1 + daily_change)
-        
-        # Simulate intraday high/low
-        high = current_price * random.uniform(1.001, 1.03)
-        low = current_price * random.uniform(0.97, 0.999)
-        
-        # Open price based on previous close with some gap
-        if day == 0:
-            open_price = current_price
-        else:
-            gap = random.uniform(-0.02, 0.02)
-            open_price = data[-1]['close'] * (1 + gap)
-        
-        # Volume simulation
-        volume = random.randint(10000000, 100000000)
-        
-        data.append({
-            'date': current_date.strftime('%Y-%m-%d'),
-            'time': current_date.strftime('%Y-%m-%d'),
-            'open': round(open_price, 2),
-            'high': round(high, 2),
-            'low': round(low, 2),
-            'close': round(current_price, 2),
-            'volume': volume
-        })
-        
-        current_date += timedelta(days=1)
-    
-    return data
 
 @app.route('/api/health')
 def health_check():
@@ -85,32 +260,22 @@ def get_candles(symbol):
         symbol = symbol.upper()
         period = request.args.get('period', '1mo')
         interval = request.args.get('interval', '1d')
+        if period not in Config.ALLOWED_PERIODS or interval not in Config.ALLOWED_INTERVALS:
+            return jsonify({'error': f'Invalid period or interval: {period}, {interval}'}), 400
+        since = request.args.get('since')
+        since = int(since) if since else None
         
-        # Map periods to days
-        period_days = {
-            '1d': 1,
-            '5d': 5, 
-            '1mo': 30,
-            '3mo': 90,
-            '6mo': 180,
-            '1y': 365,
-            '2y': 730,
-            '5y': 1825
-        }
-        
-        days = period_days.get(period, 30)
-        data = generate_mock_data(symbol, days)
+        data = generate_mock_data(symbol, period, interval)
         
-        return jsonify(data)
+        return jsonify(candles_payload(data, since))
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/company/<symbol>')
-def get_company_info(symbol):
+def mock_company(symbol):
     """Mock company information"""
-    symbol = symbol.upper()
-    
     # Mock company data
     companies = {
         'AAPL': {
@@ -155,15 +320,11 @@ def get_company_info(symbol):
         'marketCap': 50000000000,
         'image': None
     })
-    
-    return jsonify(company_data)
+    return company_data
 
-@app.route('/api/news/<symbol>')
-def get_company_news(symbol):
+def mock_news(symbol):
     """Mock news data"""
-    symbol = symbol.upper()
-    
-    mock_news = [
+    return [
         {
             'title': f'{symbol} Reports Strong Quarterly Earnings',
             'url': 'https://example.com/news1',
@@ -189,8 +350,74 @@ def get_company_news(symbol):
             'publisher': 'Bloomberg'
         }
     ]
-    
-    return jsonify(mock_news)
+
+def performance_metrics(data):
+    """The figures candles.performance_metrics serves from the real backend"""
+    if len(data) < 2:
+        return None
+    first, last = data[0]['close'], data[-1]['close']
+    return {
+        'change': last - first,
+        'changePercent': (last - first) / first * 100 if first else 0.0,
+        'high52w': max(bar['high'] for bar in data),
+        'low52w': min(bar['low'] for bar in data),
+        'avgVolume': sum(bar['volume'] for bar in data) / len(data),
+        'currentPrice': last
+    }
+
+@app.route('/api/company/<symbol>')
+def get_company_info(symbol):
+    return jsonify(mock_company(symbol.upper()))
+
+@app.route('/api/news/<symbol>')
+def get_company_news(symbol):
+    return jsonify(mock_news(symbol.upper()))
+
+@app.route('/api/dashboard/<symbol>')
+def get_dashboard(symbol):
+    """Candles, metrics, company info and news in one call, shaped like the real backend's"""
+    symbol = symbol.upper()
+    period = request.args.get('period', '1mo')
+    interval = request.args.get('interval', '1d')
+    if period not in Config.ALLOWED_PERIODS or interval not in Config.ALLOWED_INTERVALS:
+        return jsonify({'error': f'Invalid period or interval: {period}, {interval}'}), 400
+    since = request.args.get('since')
+    since = int(since) if since else None
+
+    try:
+        data = generate_mock_data(symbol, period, interval)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({
+        'symbol': symbol,
+        'period': period,
+        'interval': interval,
+        'candles': candles_payload(data, since),
+        'metrics': performance_metrics(data),
+        'company': mock_company(symbol),
+        'news': mock_news(symbol),
+        'errors': {}
+    })
+
+@app.route('/api/indicators/<symbol>')
+def get_indicators(symbol):
+    """Indicator values shaped like the real backend's; the demo keeps no state, so they are recomputed"""
+    symbol = symbol.upper()
+    period = request.args.get('period', '1mo')
+    interval = request.args.get('interval', '1d')
+    if period not in Config.ALLOWED_PERIODS or interval not in Config.ALLOWED_INTERVALS:
+        return jsonify({'error': f'Invalid period or interval: {period}, {interval}'}), 400
+    try:
+        keys = parse_indicator_spec(request.args.get('indicators', 'sma:20'))
+        since = request.args.get('since')
+        since = int(since) if since else None
+        columns = mock_columns(symbol, period, interval)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    series = IndicatorSeries(keys)
+    series.apply(CandleSeries(**columns))
+    return jsonify({'symbol': symbol, 'interval': interval, 'indicators': keys, **series.since(since)})
 
 if __name__ == '__main__':
     print("🚀 Starting Pixel Trader Demo Backend...")
@@ -2,18 +2,144 @@
 
 const API_BASE = "http://127.0.0.1:5002/api";
 
-export async function fetchCandles(symbol = 'AAPL', period = '1mo', interval = '1d') {
-  const url = `${API_BASE}/candles/${symbol}?period=${period}&interval=${interval}`;
+// --- Persistent candle cache (IndexedDB) ---
+// One record per (symbol, period, interval): the bars plus the series start
+// the server reported. Refreshes ask only for bars since the last one we hold.
+const DB_NAME = 'pixel_trader';
+const CANDLE_STORE = 'candles';
+let dbPromise = null;
+
+function openCandleDB() {
+  if (!dbPromise) {
+    dbPromise = new Promise((resolve) => {
+      if (typeof indexedDB === 'undefined') return resolve(null);
+      const req = indexedDB.open(DB_NAME, 1);
+      req.onupgradeneeded = () => req.result.createObjectStore(CANDLE_STORE, { keyPath: 'key' });
+      req.onsuccess = () => resolve(req.result);
+      req.onerror = () => resolve(null);  // No persistent cache; every load is a full fetch
+    });
+  }
+  return dbPromise;
+}
+
+async function readCachedCandles(key) {
+  const db = await openCandleDB();
+  if (!db) return null;
+  return new Promise((resolve) => {
+    const req = db.transaction(CANDLE_STORE).objectStore(CANDLE_STORE).get(key);
+    req.onsuccess = () => resolve(req.result || null);
+    req.onerror = () => resolve(null);
+  });
+}
+
+async function writeCachedCandles(key, bars) {
+  const db = await openCandleDB();
+  if (!db) return;
+  db.transaction(CANDLE_STORE, 'readwrite').objectStore(CANDLE_STORE).put({ key, bars, updated: Date.now() });
+}
+
+async function getJSON(url, fallbackMessage) {
   const resp = await fetch(url);
   if (!resp.ok) {
-    const error = await resp.json();
-    throw new Error(error.error || 'Failed to fetch candlestick data');
+    // Error bodies are JSON from our backends, but a proxy or a missing route may send HTML
+    const error = await resp.json().catch(() => ({}));
+    throw new Error(error.error || fallbackMessage);
   }
-  const data = await resp.json();
+  return resp.json();
+}
+
+// Epoch time of the last cached bar, or null if there is nothing a delta could extend
+function lastTimestamp(bars) {
+  const last = bars && bars.length ? bars[bars.length - 1].timestamp : undefined;
+  return typeof last === 'number' ? last : null;
+}
+
+// Replace cached bars from the first delta bar onwards and drop bars that slid out of the period.
+// A plain array is a server without delta support sending the whole series; null means reload.
+function mergeCandles(cached, delta, since) {
+  if (Array.isArray(delta)) return delta;
+  if (!delta || !Array.isArray(delta.candles)) return null;
+  if (cached.some(bar => typeof bar.timestamp !== 'number')) return null;
+  const from = delta.candles.length ? delta.candles[0].timestamp : since;
+  const kept = cached.filter(bar => bar.timestamp < from && bar.timestamp >= delta.start);
+  return kept.concat(delta.candles);
+}
+
+export async function fetchCandles(symbol = 'AAPL', period = '1mo', interval = '1d') {
+  const url = `${API_BASE}/candles/${symbol}?period=${period}&interval=${interval}`;
+  const key = `${symbol}|${period}|${interval}`;
+  const cached = await readCachedCandles(key);
+
+  const since = cached ? lastTimestamp(cached.bars) : null;
+  if (since !== null) {
+    const delta = await getJSON(`${url}&since=${since}`, 'Failed to fetch candlestick data');
+    const merged = mergeCandles(cached.bars, delta, since);
+    // A mismatch means bars were revised further back than the delta covers
+    if (merged && merged.length === delta.length) {
+      await writeCachedCandles(key, merged);
+      return merged;
+    }
+  }
+
+  const data = await getJSON(url, 'Failed to fetch candlestick data');
   if (!data || !Array.isArray(data)) throw new Error('No candle data');
+  await writeCachedCandles(key, data);
   return data;
 }
 
+// Candles, metrics, company info and news in one round trip. Candles go through the same
+// IndexedDB cache as fetchCandles; parts the server could not load come back null.
+// A backend without the dashboard route gets the separate requests instead.
+export async function fetchDashboard(symbol = 'AAPL', period = '1mo', interval = '1d') {
+  const url = `${API_BASE}/dashboard/${symbol}?period=${period}&interval=${interval}`;
+  const key = `${symbol}|${period}|${interval}`;
+  const cached = await readCachedCandles(key);
+  const since = cached ? lastTimestamp(cached.bars) : null;
+
+  const resp = await fetch(since !== null ? `${url}&since=${since}` : url);
+  const dashboard = await resp.json().catch(() => null);
+  if (!dashboard || (!resp.ok && !dashboard.errors)) {
+    return fetchDashboardParts(symbol, period, interval);
+  }
+
+  if (dashboard.candles && since !== null) {
+    const merged = mergeCandles(cached.bars, dashboard.candles, since);
+    dashboard.candles = merged && merged.length === dashboard.candles.length
+      ? merged
+      : await fetchCandles(symbol, period, interval);
+  }
+  if (dashboard.candles) await writeCachedCandles(key, dashboard.candles);
+  return dashboard;
+}
+
+// The dashboard shape built from the candles, company and news endpoints; metrics are left
+// to the client and a candle failure is reported under errors like the server would
+async function fetchDashboardParts(symbol, period, interval) {
+  const [candles, company, news] = await Promise.all([
+    fetchCandles(symbol, period, interval).catch(err => err),
+    fetchCompanyInfo(symbol),
+    fetchCompanyNews(symbol)
+  ]);
+  const failed = candles instanceof Error;
+  return {
+    symbol,
+    period,
+    interval,
+    candles: failed ? null : candles,
+    metrics: null,
+    company,
+    news,
+    errors: failed ? { candles: candles.message } : {}
+  };
+}
+
+// Indicator values for bars at or after `since` (epoch seconds); omit it for the whole series
+export async function fetchIndicators(symbol, period = '1mo', interval = '1d', indicators = 'sma:20', since = null) {
+  let url = `${API_BASE}/indicators/${symbol}?period=${period}&interval=${interval}&indicators=${indicators}`;
+  if (since !== null) url += `&since=${since}`;
+  return getJSON(url, 'Failed to fetch indicators');
+}
+
 export async function fetchCompanyInfo(symbol) {
   const url = `${API_BASE}/company/${symbol}`;
   try {
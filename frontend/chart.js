@@ -33,8 +33,74 @@ export function calcEMA(data, period) {
   return ema;
 }
 
+// --- Tooltip (shared by both renderers) ---
+function getTooltip() {
+  let tooltip = d3.select('#chart').select('.chart-tooltip');
+  if (tooltip.empty()) {
+    tooltip = d3.select('#chart').append('div')
+      .attr('class', 'chart-tooltip')
+      .style('position', 'absolute')
+      .style('pointer-events', 'none')
+      .style('background', '#111b')
+      .style('color', '#0ff')
+      .style('border', '1px solid #0ff')
+      .style('border-radius', '6px')
+      .style('padding', '8px 12px')
+      .style('font-family', 'inherit')
+      .style('font-size', '0.95rem')
+      .style('z-index', 100)
+      .style('display', 'none');
+  }
+  return tooltip;
+}
+
+function tooltipHtml(d) {
+  const formatDate = d3.timeFormat("%b %d, %Y");
+  const formatCurrency = d3.format("$.2f");
+  const formatVolume = d3.format(",");
+  return `
+    <b>${formatDate(d.time)}</b><br>
+    Open: ${formatCurrency(d.open)}<br>
+    Close: ${formatCurrency(d.close)}<br>
+    High: ${formatCurrency(d.high)}<br>
+    Low: ${formatCurrency(d.low)}<br>
+    ${d.volume ? `Volume: ${formatVolume(d.volume)}` : ''}
+  `;
+}
+
 // --- Chart Rendering ---
+// Series longer than this are drawn on canvas; the SVG renderer builds DOM nodes per bar
+export const CANVAS_THRESHOLD = 2000;
+let canvasChart = null;
+
+function movingAverage(data, options) {
+  if (options.maValues && options.maValues.length === data.length) {
+    // Streamed from the server's incremental indicator state
+    return options.maValues;
+  }
+  return options.maType === 'EMA' ? calcEMA(data, options.maPeriod) : calcSMA(data, options.maPeriod);
+}
+
+// options.renderer: 'svg', 'canvas' or 'auto' (canvas above CANVAS_THRESHOLD bars)
 export function renderChart(data, options = {}) {
+  const renderer = options.renderer || 'auto';
+  const useCanvas = renderer === 'canvas' || (renderer === 'auto' && data && data.length > CANVAS_THRESHOLD);
+  if (useCanvas) {
+    if (!canvasChart) {
+      d3.select('#chart').selectAll('*').remove();
+      canvasChart = new CanvasChart(document.getElementById('chart'));
+    }
+    canvasChart.update(data, options.showMA ? movingAverage(data, options) : null);
+    return;
+  }
+  if (canvasChart) {
+    canvasChart.destroy();
+    canvasChart = null;
+  }
+  renderSVGChart(data, options);
+}
+
+function renderSVGChart(data, options) {
   d3.select('#chart').selectAll('*').remove();
   
   // Responsive sizing
@@ -158,12 +224,7 @@ export function renderChart(data, options = {}) {
     .attr('opacity', 0.8);
   // Moving Average
   if (options.showMA) {
-    let ma;
-    if (options.maType === 'EMA') {
-      ma = calcEMA(data, options.maPeriod);
-    } else {
-      ma = calcSMA(data, options.maPeriod);
-    }
+    const ma = movingAverage(data, options);
     const maLine = d3.line()
       .defined((d, i) => ma[i] !== null)
       .x((d, i) => x(d.time) + x.bandwidth() / 2)
@@ -181,41 +242,399 @@ export function renderChart(data, options = {}) {
       .html('<feGaussianBlur stdDeviation="3.5" result="coloredBlur"/><feMerge><feMergeNode in="coloredBlur"/><feMergeNode in="SourceGraphic"/></feMerge>');
   }
   // Tooltip
-  let tooltip = d3.select('#chart').select('.chart-tooltip');
-  if (tooltip.empty()) {
-    tooltip = d3.select('#chart').append('div')
-      .attr('class', 'chart-tooltip')
-      .style('position', 'absolute')
-      .style('pointer-events', 'none')
-      .style('background', '#111b')
-      .style('color', '#0ff')
-      .style('border', '1px solid #0ff')
-      .style('border-radius', '6px')
-      .style('padding', '8px 12px')
-      .style('font-family', 'inherit')
-      .style('font-size', '0.95rem')
-      .style('z-index', 100)
-      .style('display', 'none');
-  }
-  function showTooltip(event, d, x, y) {
-    const formatDate = d3.timeFormat("%b %d, %Y");
-    const formatCurrency = d3.format("$.2f");
-    const formatVolume = d3.format(",");
-    
+  const tooltip = getTooltip();
+  function showTooltip(event, d) {
     tooltip.style('display', 'block')
       .style('left', (event.offsetX + 25) + 'px')
       .style('top', (event.offsetY - 20) + 'px')
-      .html(`
-        <b>${formatDate(d.time)}</b><br>
-        Open: ${formatCurrency(d.open)}<br>
-        Close: ${formatCurrency(d.close)}<br>
-        High: ${formatCurrency(d.high)}<br>
-        Low: ${formatCurrency(d.low)}<br>
-        ${d.volume ? `Volume: ${formatVolume(d.volume)}` : ''}
-      `);
+      .html(tooltipHtml(d));
   }
   function hideTooltip() {
     tooltip.style('display', 'none');
   }
   // Theme support (future: read from options.theme)
 }
+
+// --- Canvas Renderer ---
+const UP_COLOR = '#0ff';
+const DOWN_COLOR = '#ff0cf7';
+const UP_VOLUME = 'rgba(0, 255, 255, 0.27)';
+const DOWN_VOLUME = 'rgba(255, 12, 247, 0.27)';
+const BAR_FIELDS = ['open', 'high', 'low', 'close', 'volume'];
+
+// Timestamps carry the exchange wall clock as UTC. Read them back as local time,
+// as the SVG path does when it parses d.date, so both renderers label the same day
+function wallClock(timestamp) {
+  const t = new Date(timestamp * 1000);
+  return +new Date(t.getUTCFullYear(), t.getUTCMonth(), t.getUTCDate(),
+    t.getUTCHours(), t.getUTCMinutes(), t.getUTCSeconds());
+}
+
+// Columnar copy of the bars: typed arrays are cheap to scan and never touch the DOM
+function toColumns(data) {
+  const n = data.length;
+  const cols = {
+    n,
+    time: new Float64Array(n),
+    open: new Float64Array(n),
+    high: new Float64Array(n),
+    low: new Float64Array(n),
+    close: new Float64Array(n),
+    volume: new Float64Array(n)
+  };
+  for (let i = 0; i < n; i++) {
+    const d = data[i];
+    cols.time[i] = d.timestamp !== undefined ? wallClock(d.timestamp) : +new Date(d.date || d.time);
+    cols.open[i] = +d.open;
+    cols.high[i] = +d.high;
+    cols.low[i] = +d.low;
+    cols.close[i] = +d.close;
+    cols.volume[i] = +d.volume || 0;
+  }
+  return cols;
+}
+
+// With more bars than pixel columns, merge each column's bars into one OHLCV bar
+function binColumns(cols, bins) {
+  if (cols.n <= bins) return { ...cols, last: Int32Array.from({ length: cols.n }, (_, i) => i) };
+  const view = {
+    n: bins,
+    time: new Float64Array(bins),
+    open: new Float64Array(bins),
+    high: new Float64Array(bins),
+    low: new Float64Array(bins),
+    close: new Float64Array(bins),
+    volume: new Float64Array(bins),
+    last: new Int32Array(bins)  // index of the last source bar in each bin
+  };
+  for (let b = 0; b < bins; b++) {
+    const from = Math.floor(b * cols.n / bins);
+    const to = Math.floor((b + 1) * cols.n / bins);
+    let high = -Infinity, low = Infinity, volume = 0;
+    for (let i = from; i < to; i++) {
+      if (cols.high[i] > high) high = cols.high[i];
+      if (cols.low[i] < low) low = cols.low[i];
+      volume += cols.volume[i];
+    }
+    view.time[b] = cols.time[from];
+    view.open[b] = cols.open[from];
+    view.close[b] = cols.close[to - 1];
+    view.high[b] = high;
+    view.low[b] = low;
+    view.volume[b] = volume;
+    view.last[b] = to - 1;
+  }
+  return view;
+}
+
+// True when both series have the same bars except possibly the last one's prices,
+// i.e. at most the live bar was revised. A symbol switch on the same bar grid or a
+// revised earlier bar fails this and gets a full redraw.
+function sameHistory(prev, cols) {
+  if (!prev || prev.n !== cols.n) return false;
+  const last = cols.n - 1;
+  if (prev.time[last] !== cols.time[last]) return false;
+  for (const f of ['time', ...BAR_FIELDS]) {
+    const a = prev[f], b = cols[f];
+    for (let i = 0; i < last; i++) {
+      if (a[i] !== b[i]) return false;
+    }
+  }
+  return true;
+}
+
+// Binary search for the bar whose center is nearest to pixel x
+function nearestIndex(xs, x) {
+  let lo = 0, hi = xs.length - 1;
+  while (lo < hi) {
+    const mid = (lo + hi) >> 1;
+    if (xs[mid] < x) lo = mid + 1; else hi = mid;
+  }
+  return lo > 0 && x - xs[lo - 1] < xs[lo] - x ? lo - 1 : lo;
+}
+
+/**
+ * Canvas chart with one canvas per layer (axes, candles and volume, moving
+ * average, cursor). update() redraws only the layers whose inputs changed:
+ * a new MA redraws the overlay, an amended last bar repaints that bar's
+ * column, and only a new bar range or resize redraws everything. Large
+ * series are binned to one bar per pixel column, so drawing cost follows
+ * the chart width rather than the number of bars.
+ */
+export class CanvasChart {
+  constructor(container) {
+    this.container = container;
+    this.root = document.createElement('div');
+    this.root.className = 'canvas-chart';
+    this.root.style.position = 'relative';
+    container.appendChild(this.root);
+
+    this.layers = {};
+    for (const name of ['axes', 'candles', 'overlay', 'cursor']) {
+      const canvas = document.createElement('canvas');
+      canvas.style.position = name === 'axes' ? 'relative' : 'absolute';
+      canvas.style.left = '0';
+      canvas.style.top = '0';
+      canvas.style.display = 'block';
+      this.root.appendChild(canvas);
+      this.layers[name] = canvas;
+    }
+    this.size = null;
+    this.cols = null;
+    this.ma = null;
+    this.tooltip = getTooltip();
+
+    const cursor = this.layers.cursor;
+    cursor.addEventListener('mousemove', event => this.showTooltip(event));
+    cursor.addEventListener('mouseleave', () => this.hideTooltip());
+    this.onResize = () => {
+      if (this.cols && this.resize()) this.drawAll();
+    };
+    window.addEventListener('resize', this.onResize);
+  }
+
+  // Same sizing rules as the SVG renderer; returns true when the canvases changed size
+  resize() {
+    const containerWidth = this.container.offsetWidth || 800;
+    const width = Math.min(containerWidth, 1000);
+    const height = Math.max(500, width * 0.6);
+    const ratio = window.devicePixelRatio || 1;
+    if (this.size && this.size.width === width && this.size.height === height && this.size.ratio === ratio) {
+      return false;
+    }
+    this.size = { width, height, ratio };
+    for (const canvas of Object.values(this.layers)) {
+      canvas.width = Math.round(width * ratio);
+      canvas.height = Math.round(height * ratio);
+      canvas.style.width = `${width}px`;
+      canvas.style.height = `${height}px`;
+      canvas.getContext('2d').setTransform(ratio, 0, 0, ratio, 0, 0);
+    }
+    return true;
+  }
+
+  update(data, ma = null) {
+    const resized = this.resize();
+    const prev = this.cols;
+    const cols = toColumns(data || []);
+    this.cols = cols;
+    this.ma = ma;
+
+    if (cols.n === 0) {
+      this.drawEmpty();
+      return;
+    }
+    if (resized || !sameHistory(prev, cols)) {
+      this.drawAll();
+      return;
+    }
+
+    const last = cols.n - 1;
+    const lastChanged = BAR_FIELDS.some(f => prev[f][last] !== cols[f][last]);
+    if (lastChanged) {
+      if (this.view.n === cols.n && this.fitsScales(last)) {
+        // Only the live bar moved and it still fits the scales: repaint its column
+        for (const f of BAR_FIELDS) this.view[f][last] = cols[f][last];
+        this.drawCandles(last);
+      } else {
+        this.drawAll();
+        return;
+      }
+    }
+    this.drawOverlay();
+  }
+
+  layout() {
+    const { width, height } = this.size;
+    const margin = { left: 60, right: 20, top: 20, bottom: 80 };
+    const priceHeight = height - 150;
+    const plotWidth = width - margin.left - margin.right;
+    const view = binColumns(this.cols, Math.max(1, Math.floor(plotWidth)));
+    const step = plotWidth / view.n;
+    const xs = new Float64Array(view.n);
+    for (let i = 0; i < view.n; i++) xs[i] = margin.left + (i + 0.5) * step;
+
+    this.view = view;
+    this.xs = xs;
+    this.step = step;
+    this.margin = margin;
+    this.priceHeight = priceHeight;
+    this.y = d3.scaleLinear()
+      .domain([d3.min(view.low), d3.max(view.high)]).nice()
+      .range([priceHeight - margin.bottom, margin.top]);
+    this.volumeY = d3.scaleLinear()
+      .domain([0, d3.max(view.volume) || 1])
+      .range([height - 20, priceHeight + 20]);
+  }
+
+  fitsScales(i) {
+    const [low, high] = this.y.domain();
+    return this.cols.low[i] >= low && this.cols.high[i] <= high && this.cols.volume[i] <= this.volumeY.domain()[1];
+  }
+
+  drawAll() {
+    this.layout();
+    this.drawAxes();
+    this.drawCandles(0);
+    this.drawOverlay();
+  }
+
+  drawEmpty() {
+    const { width, height } = this.size;
+    for (const canvas of Object.values(this.layers)) canvas.getContext('2d').clearRect(0, 0, width, height);
+    const ctx = this.layers.axes.getContext('2d');
+    ctx.fillStyle = '#f44';
+    ctx.font = '24px sans-serif';
+    ctx.textAlign = 'center';
+    ctx.fillText('No data', width / 2, height / 2);
+  }
+
+  drawAxes() {
+    const { width, height } = this.size;
+    const { margin, priceHeight, view, xs, y, volumeY } = this;
+    const ctx = this.layers.axes.getContext('2d');
+    ctx.clearRect(0, 0, width, height);
+    ctx.font = '10px sans-serif';
+    ctx.lineWidth = 1;
+
+    // Price axis
+    ctx.strokeStyle = ctx.fillStyle = '#0ff';
+    ctx.textAlign = 'right';
+    ctx.textBaseline = 'middle';
+    ctx.beginPath();
+    ctx.moveTo(margin.left, margin.top);
+    ctx.lineTo(margin.left, priceHeight - margin.bottom);
+    ctx.lineTo(width - margin.right, priceHeight - margin.bottom);
+    for (const tick of y.ticks(8)) {
+      ctx.moveTo(margin.left - 6, y(tick));
+      ctx.lineTo(margin.left, y(tick));
+      ctx.fillText(d3.format('$.2f')(tick), margin.left - 9, y(tick));
+    }
+    ctx.stroke();
+
+    // Time axis: about ten labels whatever the series length
+    ctx.textAlign = 'center';
+    ctx.textBaseline = 'top';
+    const every = Math.ceil(view.n / 10);
+    const formatTime = d3.timeFormat('%b %d');
+    for (let i = 0; i < view.n; i += every) {
+      ctx.fillText(formatTime(new Date(view.time[i])), xs[i], priceHeight - margin.bottom + 9);
+    }
+
+    // Volume axis
+    ctx.strokeStyle = ctx.fillStyle = '#666';
+    ctx.textAlign = 'right';
+    ctx.textBaseline = 'middle';
+    ctx.beginPath();
+    ctx.moveTo(margin.left, volumeY.range()[1]);
+    ctx.lineTo(margin.left, volumeY.range()[0]);
+    for (const tick of volumeY.ticks(3)) {
+      ctx.fillText(d3.format('.2s')(tick), margin.left - 9, volumeY(tick));
+    }
+    ctx.stroke();
+  }
+
+  // Repaint bars from index `from` to the end; everything is batched into one path per colour
+  drawCandles(from) {
+    const { width, height } = this.size;
+    const { view, xs, step, y, volumeY } = this;
+    const ctx = this.layers.candles.getContext('2d');
+    const left = from === 0 ? 0 : xs[from] - step / 2;
+    ctx.clearRect(left, 0, width - left, height);
+
+    const body = Math.max(1, step * 0.7);
+    const volumeBase = volumeY(0);
+    for (const up of [true, false]) {
+      const wicks = new Path2D();
+      const bodies = new Path2D();
+      const volumes = new Path2D();
+      for (let i = from; i < view.n; i++) {
+        if ((view.close[i] > view.open[i]) !== up) continue;
+        const x = xs[i];
+        wicks.moveTo(x, y(view.high[i]));
+        wicks.lineTo(x, y(view.low[i]));
+        const top = y(Math.max(view.open[i], view.close[i]));
+        bodies.rect(x - body / 2, top, body, Math.max(1, Math.abs(y(view.open[i]) - y(view.close[i]))));
+        const v = volumeY(view.volume[i]);
+        volumes.rect(x - body / 2, v, body, volumeBase - v);
+      }
+      ctx.globalAlpha = 0.6;
+      ctx.fillStyle = up ? UP_VOLUME : DOWN_VOLUME;
+      ctx.fill(volumes);
+      ctx.globalAlpha = 0.8;
+      ctx.strokeStyle = ctx.fillStyle = up ? UP_COLOR : DOWN_COLOR;
+      ctx.lineWidth = Math.min(2, Math.max(1, step * 0.3));
+      ctx.stroke(wicks);
+      ctx.fill(bodies);
+    }
+    ctx.globalAlpha = 1;
+  }
+
+  drawOverlay() {
+    const { width, height } = this.size;
+    const ctx = this.layers.overlay.getContext('2d');
+    ctx.clearRect(0, 0, width, height);
+    const ma = this.ma;
+    if (!ma) return;
+
+    const { view, xs, y } = this;
+    ctx.beginPath();
+    let drawing = false;
+    for (let i = 0; i < view.n; i++) {
+      const value = ma[view.last[i]];
+      if (value === null || value === undefined) {
+        drawing = false;
+        continue;
+      }
+      if (drawing) ctx.lineTo(xs[i], y(value));
+      else ctx.moveTo(xs[i], y(value));
+      drawing = true;
+    }
+    ctx.strokeStyle = DOWN_COLOR;
+    ctx.lineWidth = 3;
+    ctx.lineCap = 'round';
+    ctx.shadowColor = DOWN_COLOR;
+    ctx.shadowBlur = 7;
+    ctx.stroke();
+    ctx.shadowBlur = 0;
+  }
+
+  showTooltip(event) {
+    if (!this.view) return;
+    const i = nearestIndex(this.xs, event.offsetX);
+    const view = this.view;
+    const { width, height } = this.size;
+    const ctx = this.layers.cursor.getContext('2d');
+    ctx.clearRect(0, 0, width, height);
+    ctx.strokeStyle = '#0ff6';
+    ctx.lineWidth = 1;
+    ctx.beginPath();
+    ctx.moveTo(this.xs[i], this.margin.top);
+    ctx.lineTo(this.xs[i], height - 20);
+    ctx.stroke();
+
+    this.tooltip.style('display', 'block')
+      .style('left', (event.offsetX + 25) + 'px')
+      .style('top', (event.offsetY - 20) + 'px')
+      .html(tooltipHtml({
+        time: new Date(view.time[i]),
+        open: view.open[i],
+        high: view.high[i],
+        low: view.low[i],
+        close: view.close[i],
+        volume: view.volume[i]
+      }));
+  }
+
+  hideTooltip() {
+    const { width, height } = this.size;
+    this.layers.cursor.getContext('2d').clearRect(0, 0, width, height);
+    this.tooltip.style('display', 'none');
+  }
+
+  destroy() {
+    window.removeEventListener('resize', this.onResize);
+    this.tooltip.style('display', 'none');
+    this.root.remove();
+  }
+}
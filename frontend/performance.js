@@ -5,20 +5,27 @@ export function calculatePerformanceMetrics(data) {
   const first = data[0];
   const last = data[data.length - 1];
   const change = last.close - first.close;
-  const changePercent = (change / first.close) * 100;
-  
-  const high52w = d3.max(data, d => d.high);
-  const low52w = d3.min(data, d => d.low);
-  
-  const avgVolume = d3.mean(data, d => d.volume);
   
+  return formatPerformanceMetrics({
+    change,
+    changePercent: (change / first.close) * 100,
+    high52w: d3.max(data, d => d.high),
+    low52w: d3.min(data, d => d.low),
+    avgVolume: d3.mean(data, d => d.volume),
+    currentPrice: last.close
+  });
+}
+
+// Format raw metrics (computed here or served by /api/dashboard) for the panel
+export function formatPerformanceMetrics(raw) {
+  if (!raw) return null;
   return {
-    change: change.toFixed(2),
-    changePercent: changePercent.toFixed(2),
-    high52w: high52w.toFixed(2),
-    low52w: low52w.toFixed(2),
-    avgVolume: Math.round(avgVolume).toLocaleString(),
-    currentPrice: last.close.toFixed(2)
+    change: raw.change.toFixed(2),
+    changePercent: raw.changePercent.toFixed(2),
+    high52w: raw.high52w.toFixed(2),
+    low52w: raw.low52w.toFixed(2),
+    avgVolume: Math.round(raw.avgVolume).toLocaleString(),
+    currentPrice: raw.currentPrice.toFixed(2)
   };
 }
 
@@ -1,7 +1,7 @@
 // ui.js - Handles UI logic, watchlist, selectors, loading, error, and ties everything together
-import { fetchCandles, fetchCompanyInfo, fetchCompanyNews } from './api.js';
+import { fetchCandles, fetchDashboard, fetchIndicators } from './api.js';
 import { renderChart } from './chart.js';
-import { calculatePerformanceMetrics, renderPerformancePanel } from './performance.js';
+import { calculatePerformanceMetrics, formatPerformanceMetrics, renderPerformancePanel } from './performance.js';
 
 const WATCHLIST_KEY = 'pixel_trader_watchlist';
 let watchlist = [];
@@ -10,6 +10,7 @@ let selectedPeriod = '1mo';
 let selectedInterval = '1d';
 let currentTheme = localStorage.getItem('pixel_trader_theme') || 'dark';
 let currentData = []; // Store current chart data for export
+const indicatorCache = new Map(); // symbol|period|interval|indicator -> {time, values}
 
 function setTheme(theme) {
   currentTheme = theme;
@@ -56,8 +57,7 @@ function renderWatchlist() {
     li.onclick = () => {
       selectedSymbol = symbol;
       renderWatchlist();
-      loadAndRender();
-      updateCompanyPanel(selectedSymbol);
+      loadDashboard();
     };
     const btn = document.createElement('button');
     btn.textContent = '×';
@@ -69,8 +69,7 @@ function renderWatchlist() {
       }
       saveWatchlist();
       renderWatchlist();
-      loadAndRender();
-      updateCompanyPanel(selectedSymbol);
+      loadDashboard();
     };
     li.appendChild(btn);
     ul.appendChild(li);
@@ -97,24 +96,32 @@ function setupSelectors() {
   };
 }
 
+async function renderCandles(data, metrics = null) {
+  currentData = data; // Store for export
+  
+  const showMA = document.getElementById('maToggle').checked;
+  const maType = document.getElementById('maType').value;
+  const maPeriod = parseInt(document.getElementById('maPeriod').value) || 10;
+  const maValues = showMA ? await loadIndicator(`${maType.toLowerCase()}:${maPeriod}`) : null;
+  renderChart(data, {
+    showMA,
+    maType,
+    maPeriod,
+    maValues,
+    theme: currentTheme
+  });
+  
+  // Display performance metrics, computing them locally unless the server sent them
+  renderPerformancePanel(metrics || calculatePerformanceMetrics(data), selectedSymbol);
+}
+
+// Chart only: used when the period, interval or MA settings change
 async function loadAndRender() {
   showError('');
   showLoading(true);
   try {
     const data = await fetchCandles(selectedSymbol, selectedPeriod, selectedInterval);
-    currentData = data; // Store for export
-    
-    renderChart(data, {
-      showMA: document.getElementById('maToggle').checked,
-      maType: document.getElementById('maType').value,
-      maPeriod: parseInt(document.getElementById('maPeriod').value) || 10,
-      theme: currentTheme
-    });
-    
-    // Calculate and display performance metrics
-    const metrics = calculatePerformanceMetrics(data);
-    renderPerformancePanel(metrics, selectedSymbol);
-    
+    await renderCandles(data);
     showNotification(`${selectedSymbol} chart updated`, 'success');
   } catch (err) {
     showError(err.message || 'Failed to load chart data');
@@ -124,6 +131,53 @@ async function loadAndRender() {
   }
 }
 
+// Chart, metrics, company info and news for a newly selected symbol in one request
+async function loadDashboard() {
+  showError('');
+  showLoading(true);
+  renderCompanyInfo(null);
+  renderNews([]);
+  try {
+    const dashboard = await fetchDashboard(selectedSymbol, selectedPeriod, selectedInterval);
+    renderCompanyInfo(dashboard.company);
+    renderNews(dashboard.news || []);
+    if (!dashboard.candles) throw new Error(dashboard.errors.candles || 'Failed to load chart data');
+    await renderCandles(dashboard.candles, formatPerformanceMetrics(dashboard.metrics));
+    showNotification(`${selectedSymbol} chart updated`, 'success');
+  } catch (err) {
+    showError(err.message || 'Failed to load chart data');
+    showNotification('Failed to load data', 'error');
+  } finally {
+    showLoading(false);
+  }
+}
+
+// Fetch only the indicator bars we have not seen and merge them into the cached series.
+// Returns null on failure so the chart falls back to computing the MA locally.
+async function loadIndicator(indicator) {
+  const key = `${selectedSymbol}|${selectedPeriod}|${selectedInterval}|${indicator}`;
+  const cached = indicatorCache.get(key);
+  const since = cached && cached.time.length ? cached.time[cached.time.length - 1] : null;
+  try {
+    const delta = await fetchIndicators(selectedSymbol, selectedPeriod, selectedInterval, indicator, since);
+    const values = delta.values[delta.indicators[0]];
+    let series = { time: delta.time, values };
+    if (cached && since !== null) {
+      // The delta starts at the last bar we had, which may have been amended
+      const keep = cached.time.findIndex(t => t >= (delta.time[0] ?? Infinity));
+      const cut = keep === -1 ? cached.time.length : keep;
+      series = {
+        time: cached.time.slice(0, cut).concat(delta.time).slice(-delta.length),
+        values: cached.values.slice(0, cut).concat(values).slice(-delta.length)
+      };
+    }
+    indicatorCache.set(key, series);
+    return series.values;
+  } catch {
+    return null;
+  }
+}
+
 function setupMAControls() {
   document.getElementById('maToggle').onchange = loadAndRender;
   document.getElementById('maType').onchange = loadAndRender;
@@ -167,14 +221,6 @@ function renderNews(news) {
     newsList.appendChild(li);
   });
 }
-async function updateCompanyPanel(symbol) {
-  renderCompanyInfo(null);
-  renderNews([]);
-  if (!symbol) return;
-  fetchCompanyInfo(symbol).then(renderCompanyInfo);
-  fetchCompanyNews(symbol).then(renderNews);
-}
-
 window.onload = () => {
   // animateNeonGrid(); // If you have this function, import or define it here
   loadWatchlist();
@@ -183,8 +229,7 @@ window.onload = () => {
   setupMAControls();
   setupKeyboardShortcuts();
   setTheme(currentTheme);
-  loadAndRender();
-  updateCompanyPanel(selectedSymbol);
+  loadDashboard();
   
   document.getElementById('addToWatchlistBtn').onclick = () => {
     const input = document.getElementById('symbolInput');
@@ -192,8 +237,7 @@ window.onload = () => {
     input.value = '';
     input.focus(); // Keep focus for easy multiple additions
     renderWatchlist();
-    loadAndRender();
-    updateCompanyPanel(selectedSymbol);
+    loadDashboard();
   };
   
   // Add Enter key support for symbol input
@@ -205,8 +249,7 @@ window.onload = () => {
   });
   
   document.getElementById('fetchBtn').onclick = () => {
-    loadAndRender();
-    updateCompanyPanel(selectedSymbol);
+    loadDashboard();
   };
   
   // Export functionality
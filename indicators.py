@@ -0,0 +1,538 @@
+"""
+indicators.py
+Streaming technical indicators, updated in O(1) per new or amended bar
+"""
+
+import json
+import bisect
+import secrets
+from array import array
+from collections import deque
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+# Field positions in a candle row as produced by CandleSeries.rows()
+TIME, OPEN, HIGH, LOW, CLOSE, VOLUME = range(6)
+
+# Bump when indicator state changes shape so old snapshots are ignored
+STATE_VERSION = 3
+MAX_PERIOD = 500
+# Bars per value-history block; a refresh rewrites only the block holding the last bar
+HISTORY_BLOCK = 2048
+NAN = float('nan')
+
+def _optional_float(value) -> Optional[float]:
+    return None if value is None else float(value)
+
+def _floats(values: Sequence, length: int) -> List[float]:
+    if len(values) != length:
+        raise ValueError('Ring does not match the period')
+    return [float(value) for value in values]
+
+class Indicator:
+    """
+    Base class for one streaming indicator. update() takes a candle row and
+    returns the indicator value for that bar (None while warming up). With
+    amend=True the row replaces the last bar instead of appending a new one,
+    which is how a still-forming live bar is revised. Subclasses keep a
+    checkpoint of the state before the last bar so an amend is just a
+    restore followed by a normal update. dump() and load() carry that state
+    as plain JSON-compatible values.
+    """
+
+    def __init__(self, period: int):
+        self.period = period
+        self.count = 0
+        self.value: Optional[float] = None
+
+    def dump(self) -> dict:
+        return {'count': self.count, 'value': self.value, **self._dump()}
+
+    def load(self, state: dict) -> None:
+        """Restore dump() output; raises ValueError/KeyError/TypeError if it does not fit"""
+        self.count = int(state['count'])
+        self.value = _optional_float(state['value'])
+        self._load(state)
+
+    def _dump(self) -> dict:
+        raise NotImplementedError
+
+    def _load(self, state: dict) -> None:
+        raise NotImplementedError
+
+    def update(self, bar: Sequence, amend: bool = False) -> Optional[float]:
+        if amend and self.count:
+            self._restore()
+        else:
+            self.count += 1
+            self._checkpoint()
+        self.value = self._apply(bar)
+        return self.value
+
+    def _checkpoint(self) -> None:
+        raise NotImplementedError
+
+    def _restore(self) -> None:
+        raise NotImplementedError
+
+    def _apply(self, bar: Sequence) -> Optional[float]:
+        raise NotImplementedError
+
+class SMA(Indicator):
+    """Simple moving average of closes over a ring buffer with a running sum"""
+
+    def __init__(self, period: int):
+        super().__init__(period)
+        self.ring = [0.0] * period
+        self.total = 0.0
+
+    def _evict(self) -> None:
+        # A new bar overwrites the oldest slot; an amend overwrites the newest
+        slot = (self.count - 1) % self.period
+        self.total -= self.ring[slot]
+        self.ring[slot] = 0.0
+
+    _checkpoint = _evict
+    _restore = _evict
+
+    def _dump(self) -> dict:
+        return {'ring': self.ring, 'total': self.total}
+
+    def _load(self, state: dict) -> None:
+        self.ring = _floats(state['ring'], self.period)
+        self.total = float(state['total'])
+
+    def _apply(self, bar: Sequence) -> Optional[float]:
+        close = bar[CLOSE]
+        self.ring[(self.count - 1) % self.period] = close
+        self.total += close
+        if self.count < self.period:
+            return None
+        return self.total / self.period
+
+class EMA(Indicator):
+    """Exponential moving average of closes, seeded with the SMA of the first period bars"""
+
+    def __init__(self, period: int):
+        super().__init__(period)
+        self.k = 2 / (period + 1)
+        self.seed = 0.0
+        self.ema: Optional[float] = None
+        self._saved: Tuple[float, Optional[float]] = (0.0, None)
+
+    def _checkpoint(self) -> None:
+        self._saved = (self.seed, self.ema)
+
+    def _restore(self) -> None:
+        self.seed, self.ema = self._saved
+
+    def _dump(self) -> dict:
+        return {'seed': self.seed, 'ema': self.ema, 'saved': self._saved}
+
+    def _load(self, state: dict) -> None:
+        self.seed = float(state['seed'])
+        self.ema = _optional_float(state['ema'])
+        seed, ema = state['saved']
+        self._saved = (float(seed), _optional_float(ema))
+
+    def _apply(self, bar: Sequence) -> Optional[float]:
+        close = bar[CLOSE]
+        if self.count <= self.period:
+            self.seed += close
+            if self.count == self.period:
+                self.ema = self.seed / self.period
+        else:
+            self.ema = close * self.k + self.ema * (1 - self.k)
+        return self.ema
+
+class RSI(Indicator):
+    """Wilder's relative strength index of closes"""
+
+    def __init__(self, period: int):
+        super().__init__(period)
+        self.prev_close: Optional[float] = None
+        self.last_close: Optional[float] = None
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self._saved: Tuple[Optional[float], float, float] = (None, 0.0, 0.0)
+
+    def _checkpoint(self) -> None:
+        self.prev_close = self.last_close
+        self._saved = (self.prev_close, self.avg_gain, self.avg_loss)
+
+    def _restore(self) -> None:
+        self.prev_close, self.avg_gain, self.avg_loss = self._saved
+
+    def _dump(self) -> dict:
+        return {
+            'prev_close': self.prev_close,
+            'last_close': self.last_close,
+            'avg_gain': self.avg_gain,
+            'avg_loss': self.avg_loss,
+            'saved': self._saved
+        }
+
+    def _load(self, state: dict) -> None:
+        self.prev_close = _optional_float(state['prev_close'])
+        self.last_close = _optional_float(state['last_close'])
+        self.avg_gain = float(state['avg_gain'])
+        self.avg_loss = float(state['avg_loss'])
+        prev_close, avg_gain, avg_loss = state['saved']
+        self._saved = (_optional_float(prev_close), float(avg_gain), float(avg_loss))
+
+    def _apply(self, bar: Sequence) -> Optional[float]:
+        close = self.last_close = bar[CLOSE]
+        if self.prev_close is None:
+            return None
+        change = close - self.prev_close
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+        changes = self.count - 1
+        n = self.period
+        if changes <= n:
+            # Warm-up: plain average of the first `period` changes
+            self.avg_gain += gain / n
+            self.avg_loss += loss / n
+            if changes < n:
+                return None
+        else:
+            self.avg_gain = (self.avg_gain * (n - 1) + gain) / n
+            self.avg_loss = (self.avg_loss * (n - 1) + loss) / n
+        if self.avg_loss == 0:
+            return 100.0
+        return 100 - 100 / (1 + self.avg_gain / self.avg_loss)
+
+class VWAP(Indicator):
+    """
+    Rolling volume-weighted average of the typical price over the last
+    period bars, so the value does not depend on where the series starts.
+    """
+
+    def __init__(self, period: int):
+        super().__init__(period)
+        self.ring: List[Tuple[float, float]] = [(0.0, 0.0)] * period
+        self.pv = 0.0
+        self.volume = 0.0
+
+    def _evict(self) -> None:
+        slot = (self.count - 1) % self.period
+        pv, volume = self.ring[slot]
+        self.pv -= pv
+        self.volume -= volume
+        self.ring[slot] = (0.0, 0.0)
+
+    _checkpoint = _evict
+    _restore = _evict
+
+    def _dump(self) -> dict:
+        return {'ring': self.ring, 'pv': self.pv, 'volume': self.volume}
+
+    def _load(self, state: dict) -> None:
+        if len(state['ring']) != self.period:
+            raise ValueError('Ring does not match the period')
+        self.ring = [(float(pv), float(volume)) for pv, volume in state['ring']]
+        self.pv = float(state['pv'])
+        self.volume = float(state['volume'])
+
+    def _apply(self, bar: Sequence) -> Optional[float]:
+        volume = float(bar[VOLUME])
+        pv = (bar[HIGH] + bar[LOW] + bar[CLOSE]) / 3 * volume
+        self.ring[(self.count - 1) % self.period] = (pv, volume)
+        self.pv += pv
+        self.volume += volume
+        if self.count < self.period or self.volume <= 0:
+            return None
+        return self.pv / self.volume
+
+class RollingExtreme(Indicator):
+    """
+    Rolling max of highs (or min of lows) with a monotonic deque: amortized
+    O(1) per bar. A live bar's high only rises and its low only falls, so an
+    amend normally stays on the fast path; an amend that retreats rebuilds
+    the deque from the window, which is O(period).
+    """
+
+    field = HIGH
+    sign = 1.0
+
+    def __init__(self, period: int):
+        super().__init__(period)
+        self.window: deque = deque(maxlen=period)
+        # (bar number, signed value); signed values decrease front to back
+        self.candidates: deque = deque()
+
+    def _dump(self) -> dict:
+        return {'window': list(self.window), 'candidates': list(self.candidates)}
+
+    def _load(self, state: dict) -> None:
+        if len(state['window']) > self.period or bool(state['candidates']) != bool(state['window']):
+            raise ValueError('Window does not match the period')
+        self.window = deque((float(value) for value in state['window']), maxlen=self.period)
+        self.candidates = deque((int(number), float(value)) for number, value in state['candidates'])
+
+    def _push(self, number: int, signed: float) -> None:
+        candidates = self.candidates
+        while candidates and candidates[-1][1] <= signed:
+            candidates.pop()
+        candidates.append((number, signed))
+
+    def update(self, bar: Sequence, amend: bool = False) -> Optional[float]:
+        signed = self.sign * bar[self.field]
+        if amend and self.count:
+            previous = self.window[-1]
+            self.window[-1] = signed
+            if signed >= previous:
+                if self.candidates and self.candidates[-1][0] == self.count:
+                    self.candidates.pop()
+                self._push(self.count, signed)
+            else:
+                first = self.count - len(self.window) + 1
+                self.candidates.clear()
+                for number, value in enumerate(self.window, first):
+                    self._push(number, value)
+        else:
+            self.count += 1
+            self.window.append(signed)
+            self._push(self.count, signed)
+            while self.candidates[0][0] <= self.count - self.period:
+                self.candidates.popleft()
+        if self.count < self.period:
+            self.value = None
+        else:
+            self.value = self.sign * self.candidates[0][1]
+        return self.value
+
+class RollingMax(RollingExtreme):
+    field = HIGH
+    sign = 1.0
+
+class RollingMin(RollingExtreme):
+    field = LOW
+    sign = -1.0
+
+INDICATORS = {
+    'sma': SMA,
+    'ema': EMA,
+    'rsi': RSI,
+    'vwap': VWAP,
+    'max': RollingMax,
+    'min': RollingMin
+}
+DEFAULT_PERIODS = {'sma': 20, 'ema': 20, 'rsi': 14, 'vwap': 20, 'max': 20, 'min': 20}
+
+def parse_indicator_spec(spec: str) -> List[str]:
+    """
+    Parse 'sma:20,ema:10,rsi' into canonical keys like ['sma:20', 'ema:10', 'rsi:14'].
+    Raises ValueError for unknown indicators or bad periods.
+    """
+    keys = []
+    for part in spec.split(','):
+        part = part.strip().lower()
+        if not part:
+            continue
+        name, _, period = part.partition(':')
+        if name not in INDICATORS:
+            raise ValueError(f'Unknown indicator: {name}. Allowed: {", ".join(sorted(INDICATORS))}')
+        try:
+            period = int(period) if period else DEFAULT_PERIODS[name]
+        except ValueError:
+            raise ValueError(f'Invalid period for {name}: {period}')
+        if not 1 <= period <= MAX_PERIOD:
+            raise ValueError(f'Period for {name} must be between 1 and {MAX_PERIOD}')
+        key = f'{name}:{period}'
+        if key not in keys:
+            keys.append(key)
+    if not keys:
+        raise ValueError('At least one indicator is required')
+    return keys
+
+class HistoryMissing(LookupError):
+    """A history block the series needs is gone from the cache (expired or evicted)"""
+
+def encode_block(times: Sequence[int], values: Dict[str, List[Optional[float]]], keys: Sequence[str]) -> bytes:
+    """Pack a history block as an int64 time column then one float64 column per key (NaN for None)"""
+    columns = [array('q', times)]
+    columns.extend(array('d', [NAN if v is None else v for v in values[key]]) for key in keys)
+    return b''.join(column.tobytes() for column in columns)
+
+def decode_block(buf: bytes, keys: Sequence[str]) -> Tuple[List[int], Dict[str, List[Optional[float]]]]:
+    width = 8 * (1 + len(keys))
+    if len(buf) % width:
+        raise ValueError('History block does not match the indicators')
+    n = len(buf) // width
+    times = array('q')
+    times.frombytes(buf[:8 * n])
+    values = {}
+    for i, key in enumerate(keys, start=1):
+        column = array('d')
+        column.frombytes(buf[8 * n * i:8 * n * (i + 1)])
+        values[key] = [None if v != v else v for v in column]
+    return times.tolist(), values
+
+class IndicatorSeries:
+    """
+    A set of streaming indicators over one candle series, plus the value
+    history for every bar so any client can be sent just the bars it has not
+    seen. apply() folds in a refreshed candle series: the last bar already
+    seen is amended and only bars after it are processed, so a refresh costs
+    O(new bars) rather than a recomputation of the whole series.
+
+    The history is kept in blocks of HISTORY_BLOCK bars, numbered from the
+    first bar ever applied, and read through read_block only when needed.
+    A refresh touches the block holding the last bar and since() near the end
+    reads only the last block or two, so neither depends on the history length.
+    """
+
+    def __init__(self, keys: Sequence[str], read_block: Optional[Callable[[str], Optional[bytes]]] = None):
+        self.version = STATE_VERSION
+        self.keys = list(keys)
+        self.read_block = read_block
+        self.reset()
+
+    def reset(self) -> None:
+        self.indicators: Dict[str, Indicator] = {}
+        for key in self.keys:
+            name, period = key.split(':')
+            self.indicators[key] = INDICATORS[name](int(period))
+        # A new generation never reads blocks written before the reset
+        self.generation = secrets.token_hex(4)
+        self.last_row: Optional[tuple] = None
+        # Bar numbers still covered by the candles are start..end-1
+        self.start = 0
+        self.end = 0
+        self.blocks: Dict[int, Tuple[List[int], Dict[str, List[Optional[float]]]]] = {}
+        self.dirty: Set[int] = set()
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def block_name(self, number: int) -> str:
+        return f'{self.generation}:{number}'
+
+    def _block(self, number: int) -> Tuple[List[int], Dict[str, List[Optional[float]]]]:
+        block = self.blocks.get(number)
+        if block is None:
+            buf = self.read_block(self.block_name(number)) if self.read_block else None
+            if buf is None:
+                raise HistoryMissing(f'History block {number} is missing')
+            times, values = decode_block(buf, self.keys)
+            length = min(self.end, (number + 1) * HISTORY_BLOCK) - number * HISTORY_BLOCK
+            if len(times) < length:
+                raise HistoryMissing(f'History block {number} is short')
+            block = self.blocks[number] = (
+                times[:length], {key: column[:length] for key, column in values.items()}
+            )
+        return block
+
+    def apply(self, candles) -> int:
+        """
+        Bring the series up to date with a candle series; returns how many bars
+        were (re)computed. Raises HistoryMissing, before changing anything, if
+        the block holding the last bar can no longer be read.
+        """
+        times = candles.time
+        start = 0
+        if self.end:
+            last = self.last_row[TIME]
+            start = int(times.searchsorted(last))
+            if start == len(times) or times[start] != last:
+                # The upstream history no longer contains our last bar: start over
+                self.reset()
+                start = 0
+            elif start == len(times) - 1 and next(candles[start:].rows()) == self.last_row:
+                return 0
+
+        rows = list(candles[start:].rows())
+        amend = self.end > 0
+        for row in rows:
+            number, slot = divmod(self.end - 1 if amend else self.end, HISTORY_BLOCK)
+            if slot or amend:
+                block_times, block_values = self._block(number)
+            else:
+                block_times, block_values = self.blocks[number] = ([], {key: [] for key in self.keys})
+            for key, indicator in self.indicators.items():
+                value = indicator.update(row, amend)
+                if amend:
+                    block_values[key][slot] = value
+                else:
+                    block_values[key].append(value)
+            if not amend:
+                block_times.append(row[TIME])
+                self.end += 1
+            self.dirty.add(number)
+            amend = False
+        if rows:
+            self.last_row = rows[-1]
+
+        # The candle window slides forward over time; drop history it no longer covers
+        self.start = max(self.start, self.end - len(times))
+        return len(rows)
+
+    def since(self, timestamp: Optional[int] = None) -> dict:
+        """Values for bars at or after timestamp (every bar when None); raises HistoryMissing"""
+        times: List[int] = []
+        values: Dict[str, List[Optional[float]]] = {key: [] for key in self.keys}
+        if self.end > self.start:
+            first = self.start // HISTORY_BLOCK
+            number = last = (self.end - 1) // HISTORY_BLOCK
+            if timestamp is None:
+                number = first
+            # Walk back from the newest block to the one holding timestamp
+            while number > first and self._block(number)[0][0] > timestamp:
+                number -= 1
+            for n in range(number, last + 1):
+                block_times, block_values = self._block(n)
+                lo = max(self.start - n * HISTORY_BLOCK, 0)
+                times.extend(block_times[lo:])
+                for key in self.keys:
+                    values[key].extend(block_values[key][lo:])
+        cut = 0 if timestamp is None else bisect.bisect_left(times, timestamp)
+        return {
+            'time': times[cut:],
+            'values': {key: column[cut:] for key, column in values.items()},
+            'length': len(self)
+        }
+
+def dump_series(series: IndicatorSeries) -> bytes:
+    """
+    Encode the indicator state as JSON, without the value history (see
+    dump_history). The cache is a shared file, so snapshots never hold code.
+    """
+    return json.dumps({
+        'version': STATE_VERSION,
+        'keys': series.keys,
+        'generation': series.generation,
+        'start': series.start,
+        'end': series.end,
+        'last_row': series.last_row,
+        'indicators': {key: indicator.dump() for key, indicator in series.indicators.items()}
+    }, separators=(',', ':')).encode()
+
+def dump_history(series: IndicatorSeries) -> Dict[str, bytes]:
+    """The history blocks apply() changed, packed and keyed by block name"""
+    return {
+        series.block_name(number): encode_block(*series.blocks[number], series.keys)
+        for number in sorted(series.dirty)
+    }
+
+def load_series(buf: Optional[bytes], keys: Sequence[str],
+                read_block: Optional[Callable[[str], Optional[bytes]]] = None) -> IndicatorSeries:
+    """Restore a snapshot, or start fresh if there is none, it is from another version or it is malformed"""
+    series = IndicatorSeries(keys, read_block)
+    if not buf:
+        return series
+    try:
+        state = json.loads(buf)
+        if state['version'] != STATE_VERSION or state['keys'] != series.keys:
+            return series
+        start, end = int(state['start']), int(state['end'])
+        last_row = state['last_row']
+        if not 0 <= start <= end or (last_row is None) != (end == 0):
+            raise ValueError('History bounds do not match the last bar')
+        for key, indicator in series.indicators.items():
+            indicator.load(state['indicators'][key])
+        series.generation = str(state['generation'])
+        series.start, series.end = start, end
+        series.last_row = tuple(last_row) if last_row is not None else None
+        return series
+    except (ValueError, KeyError, TypeError, IndexError):
+        return IndicatorSeries(keys, read_block)
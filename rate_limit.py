@@ -0,0 +1,144 @@
+"""
+rate_limit.py
+Token-bucket rate limiting shared across worker processes
+"""
+
+import math
+import time
+import logging
+import sqlite3
+import functools
+from flask import current_app, g, jsonify, request
+from typing import Callable, Tuple
+from shared_cache import LocalConnection
+
+logger = logging.getLogger(__name__)
+
+# Buckets idle for a whole period are full again; drop them every this many checks
+PRUNE_EVERY = 1000
+
+class RateLimitExceeded(Exception):
+    """Raised when a client has spent its request budget"""
+    def __init__(self, retry_after: float):
+        super().__init__('Rate limit exceeded')
+        self.retry_after = retry_after
+
+class TokenBucketLimiter:
+    """
+    Per-key token buckets stored in a SQLite file shared by all workers.
+    Each check is one primary-key read and write inside an immediate
+    transaction, so concurrent workers can never double-spend a bucket.
+    """
+
+    def __init__(self, path: str, capacity: float, period: float):
+        self.path = path
+        self.capacity = float(capacity)
+        self.period = float(period)
+        self.rate = self.capacity / self.period
+        self._conn = LocalConnection(path, self._setup)
+        self._calls = 0
+
+    @staticmethod
+    def _setup(conn: sqlite3.Connection) -> None:
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS buckets ('
+            'key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL'
+            ') WITHOUT ROWID'
+        )
+
+    def consume(self, key: str, cost: float = 1.0) -> Tuple[bool, float, float]:
+        """Try to take `cost` tokens from a bucket. Returns (allowed, remaining, retry_after)"""
+        now = time.time()
+        conn = self._conn.get()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT tokens, updated FROM buckets WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                tokens = self.capacity
+            else:
+                tokens = min(self.capacity, row[0] + (now - row[1]) * self.rate)
+
+            if tokens >= cost:
+                tokens -= cost
+                allowed, retry_after = True, 0.0
+            else:
+                allowed, retry_after = False, (cost - tokens) / self.rate
+
+            conn.execute(
+                'INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)',
+                (key, tokens, now)
+            )
+            self._calls += 1
+            if self._calls % PRUNE_EVERY == 0:
+                conn.execute('DELETE FROM buckets WHERE updated < ?', (now - self.period,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return allowed, tokens, retry_after
+
+def init_rate_limiter(app) -> None:
+    """Attach a shared limiter to the app if rate limiting is enabled"""
+    if not app.config.get('RATE_LIMIT_ENABLED', True):
+        return
+    app.extensions['rate_limiter'] = TokenBucketLimiter(
+        app.config['RATE_LIMIT_STORAGE'],
+        app.config['RATE_LIMIT_REQUESTS'],
+        app.config['RATE_LIMIT_PERIOD']
+    )
+
+def rate_limit_response(retry_after: float):
+    """Build a 429 response with a Retry-After header"""
+    seconds = max(1, math.ceil(retry_after))
+    response = jsonify({'error': 'Rate limit exceeded', 'retryAfter': seconds})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(seconds)
+    return response
+
+def _consume(key: str, cost: float) -> Tuple[bool, float]:
+    """
+    Charge a bucket, failing open: a locked or broken limiter file should not
+    turn every request into a 500. Returns (allowed, retry_after).
+    """
+    try:
+        allowed, _, retry_after = current_app.extensions['rate_limiter'].consume(key, cost)
+    except sqlite3.Error as e:
+        logger.warning(f'Rate limiter unavailable, allowing request: {e}')
+        return True, 0.0
+    return allowed, retry_after
+
+def client_address() -> str:
+    """The client's address; with TRUSTED_PROXIES set ProxyFix has already taken it from X-Forwarded-For"""
+    return request.remote_addr or 'unknown'
+
+def rate_limited(f: Callable) -> Callable:
+    """
+    Decorator charging every request the cheap cached cost per client and endpoint.
+    Handlers that go to the upstream call charge_upstream() for the remainder.
+    """
+    @functools.wraps(f)
+    def wrapper(*args, **kwargs):
+        limiter = current_app.extensions.get('rate_limiter')
+        if limiter is not None:
+            key = f'{client_address()}:{request.endpoint}'
+            allowed, retry_after = _consume(key, current_app.config['RATE_LIMIT_CACHED_COST'])
+            if not allowed:
+                return rate_limit_response(retry_after)
+            g.rate_limit_key = key
+        return f(*args, **kwargs)
+    return wrapper
+
+def charge_upstream(calls: int = 1) -> None:
+    """
+    Charge the rest of a full request per upstream call before making them.
+    All calls are charged at once, so a request either can afford every call or gets a 429.
+    """
+    limiter = current_app.extensions.get('rate_limiter')
+    key = g.get('rate_limit_key')
+    if limiter is None or key is None:
+        return
+    allowed, retry_after = _consume(key, calls - current_app.config['RATE_LIMIT_CACHED_COST'])
+    if not allowed:
+        raise RateLimitExceeded(retry_after)
@@ -0,0 +1,164 @@
+"""
+screener.py
+Per-symbol statistics index, updated as candles are ingested, and the screener over it
+"""
+
+import time
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from shared_cache import LocalConnection
+from candles import CandleSeries
+
+YEAR_SECONDS = 365 * 86400
+
+# Numeric columns of the index, in table order; every one can be filtered and sorted on
+STAT_COLUMNS = (
+    'last_time',
+    'close',
+    'change_pct',        # first to last close of the ingested series, as in calculatePerformanceMetrics
+    'day_change_pct',    # last close against the previous bar's close
+    'volume',
+    'avg_volume',        # mean volume of the bars before the last one
+    'volume_ratio',      # last volume / avg_volume
+    'high_52w',
+    'low_52w',
+    'pct_from_high',     # how far the last close sits below the 52-week high
+    'new_high',          # 1.0 when the last bar set the 52-week high
+    'bars'
+)
+
+def compute_stats(candles: CandleSeries) -> Dict[str, float]:
+    """Screener statistics for one candle series (at least one bar)"""
+    close = candles.close
+    volume = candles.volume.astype(np.float64)
+    last_time = int(candles.time[-1])
+    year = candles.since(last_time - YEAR_SECONDS + 1)
+    high_52w = float(year.high.max())
+    last_close = float(close[-1])
+
+    previous_volume = volume[:-1]
+    avg_volume = float(previous_volume.mean()) if len(previous_volume) else 0.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {
+            'last_time': last_time,
+            'close': last_close,
+            'change_pct': float((last_close / close[0] - 1) * 100),
+            'day_change_pct': float((last_close / close[-2] - 1) * 100) if len(close) > 1 else 0.0,
+            'volume': float(volume[-1]),
+            'avg_volume': avg_volume,
+            'volume_ratio': float(volume[-1] / avg_volume) if avg_volume else 0.0,
+            'high_52w': high_52w,
+            'low_52w': float(year.low.min()),
+            'pct_from_high': float((1 - last_close / high_52w) * 100) if high_52w else 0.0,
+            'new_high': float(candles.high[-1] >= high_52w),
+            'bars': len(candles)
+        }
+
+class StatsIndex:
+    """
+    One row of statistics per (symbol, period, interval) in a SQLite table
+    shared by every worker. Rows are replaced whenever that symbol's candles
+    are fetched from the upstream, so the index is maintained one symbol at a
+    time and a screen never reads raw bars. A screen covers one period, so
+    every row it compares was computed over the same window; the 52-week
+    columns only span a full year for periods of a year or more. Each process
+    keeps a columnar NumPy copy per (period, interval) and reloads it only
+    when the table has changed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = LocalConnection(path, self._setup)
+        self._columns: Dict[Tuple[str, str], Tuple[tuple, Dict[str, np.ndarray]]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _setup(conn: sqlite3.Connection) -> None:
+        existing = [row[1] for row in conn.execute('PRAGMA table_info(symbol_stats)')]
+        if existing and 'period' not in existing:
+            # Rows from before the index was keyed by period mix windows; they refill on the next fetch
+            conn.execute('DROP TABLE symbol_stats')
+        columns = ', '.join(f'{name} REAL' for name in STAT_COLUMNS)
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS symbol_stats ('
+            f'symbol TEXT NOT NULL, period TEXT NOT NULL, interval TEXT NOT NULL, {columns}, '
+            'updated REAL NOT NULL, '
+            'PRIMARY KEY (period, interval, symbol)'
+            ') WITHOUT ROWID'
+        )
+
+    def update(self, symbol: str, period: str, interval: str, candles: CandleSeries) -> None:
+        """Recompute one symbol's row for a period from freshly ingested candles"""
+        if len(candles) == 0:
+            return
+        stats = compute_stats(candles)
+        placeholders = ', '.join('?' * (len(STAT_COLUMNS) + 4))
+        self._conn.get().execute(
+            f'INSERT OR REPLACE INTO symbol_stats (symbol, period, interval, {", ".join(STAT_COLUMNS)}, updated) '
+            f'VALUES ({placeholders})',
+            (symbol, period, interval, *(stats[name] for name in STAT_COLUMNS), time.time())
+        )
+
+    def columns(self, period: str, interval: str) -> Dict[str, np.ndarray]:
+        """The index for one period and interval as NumPy columns, plus a 'symbol' column"""
+        conn = self._conn.get()
+        version = conn.execute(
+            'SELECT COUNT(*), MAX(updated) FROM symbol_stats WHERE period = ? AND interval = ?',
+            (period, interval)
+        ).fetchone()
+        cached = self._columns.get((period, interval))
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        rows = conn.execute(
+            f'SELECT symbol, {", ".join(STAT_COLUMNS)} FROM symbol_stats WHERE period = ? AND interval = ?',
+            (period, interval)
+        ).fetchall()
+        columns = {'symbol': np.array([row[0] for row in rows], dtype=object)}
+        values = np.array([row[1:] for row in rows], dtype=np.float64).reshape(len(rows), len(STAT_COLUMNS))
+        for i, name in enumerate(STAT_COLUMNS):
+            columns[name] = values[:, i]
+        with self._lock:
+            self._columns[(period, interval)] = (version, columns)
+        return columns
+
+    def screen(
+        self,
+        period: str = '1y',
+        interval: str = '1d',
+        ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+        sort: str = 'change_pct',
+        descending: bool = True,
+        limit: int = 50
+    ) -> Tuple[int, List[dict]]:
+        """
+        Filter with {column: (min, max)} ranges (either bound may be None), sort
+        and cut to limit. Returns (number of matches, top rows).
+        """
+        columns = self.columns(period, interval)
+        mask = np.ones(len(columns['symbol']), dtype=bool)
+        for name, (low, high) in (ranges or {}).items():
+            column = columns[name]
+            if low is not None:
+                mask &= column >= low
+            if high is not None:
+                mask &= column <= high
+
+        matches = np.flatnonzero(mask)
+        keys = columns[sort][matches]
+        order = np.argsort(-keys if descending else keys, kind='stable')[:limit]
+        picked = matches[order]
+
+        rows = []
+        for i in picked.tolist():
+            row = {'symbol': columns['symbol'][i]}
+            for name in STAT_COLUMNS:
+                value = columns[name][i].item()
+                row[name] = value if value == value else None
+            row['new_high'] = bool(row['new_high'])
+            row['last_time'] = int(row['last_time'])
+            row['bars'] = int(row['bars'])
+            rows.append(row)
+        return len(matches), rows
@@ -0,0 +1,209 @@
+"""
+shared_cache.py
+Host-wide cache shared by every worker process, backed by SQLite in WAL mode
+"""
+
+import os
+import time
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# How often a worker waiting on another worker's refresh re-checks the entry
+POLL_INTERVAL = 0.05
+PRUNE_EVERY = 500
+
+class LocalConnection:
+    """
+    One SQLite connection per thread and per process. Connections must never
+    be shared across a fork, so a pid change forces a reconnect.
+    """
+
+    def __init__(self, path: str, setup: Callable[[sqlite3.Connection], None]):
+        self.path = path
+        self.setup = setup
+        self._local = threading.local()
+
+    def get(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')
+            self.setup(conn)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+class SharedCache:
+    """
+    Key/value cache stored in one SQLite file per host. Values are raw bytes so
+    callers choose their own encoding, and reads are served from SQLite's
+    memory map. A lease table gives cross-process single-flight refreshes:
+    only the worker holding a key's lease calls the loader, the others serve
+    the stale value or wait for the fresh one.
+    """
+
+    def __init__(self, path: str, lease_timeout: float = 30.0, stale_grace: float = 3600.0):
+        self.path = path
+        self.lease_timeout = lease_timeout
+        self.stale_grace = stale_grace
+        self._conn = LocalConnection(path, self._setup)
+        self._writes = 0
+
+    @staticmethod
+    def _setup(conn: sqlite3.Connection) -> None:
+        conn.execute('PRAGMA mmap_size=268435456')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL'
+            ')'
+        )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS leases ('
+            'key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL'
+            ') WITHOUT ROWID'
+        )
+
+    def _owner_id(self) -> str:
+        return f'{os.getpid()}:{threading.get_ident()}'
+
+    def get_entry(self, key: str) -> Optional[Tuple[bytes, float]]:
+        """Return (value, expires) for a key, including expired entries"""
+        row = self._conn.get().execute(
+            'SELECT value, expires FROM entries WHERE key = ?', (key,)
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return a fresh value or None"""
+        entry = self.get_entry(key)
+        if entry is None or entry[1] < time.time():
+            return None
+        return entry[0]
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        now = time.time()
+        conn = self._conn.get()
+        conn.execute(
+            'INSERT OR REPLACE INTO entries (key, value, expires) VALUES (?, ?, ?)',
+            (key, sqlite3.Binary(value), now + ttl)
+        )
+        self._writes += 1
+        if self._writes % PRUNE_EVERY == 0:
+            conn.execute('DELETE FROM entries WHERE expires < ?', (now - self.stale_grace,))
+
+    def delete(self, key: str) -> None:
+        self._conn.get().execute('DELETE FROM entries WHERE key = ?', (key,))
+
+    def _acquire_lease(self, key: str) -> bool:
+        now = time.time()
+        cur = self._conn.get().execute(
+            'INSERT INTO leases (key, owner, expires) VALUES (?, ?, ?) '
+            'ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, expires = excluded.expires '
+            'WHERE leases.expires < ?',
+            (key, self._owner_id(), now + self.lease_timeout, now)
+        )
+        return cur.rowcount == 1
+
+    def _release_lease(self, key: str) -> None:
+        self._conn.get().execute(
+            'DELETE FROM leases WHERE key = ? AND owner = ?', (key, self._owner_id())
+        )
+
+    @contextmanager
+    def lease(self, key: str) -> Iterator[bool]:
+        """Hold a key's lease for the block; yields False if another worker holds it"""
+        acquired = self._acquire_lease(key)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                self._release_lease(key)
+
+    def iter_entries(self, min_expires: float) -> Iterator[Tuple[str, bytes, float]]:
+        """Every (key, value, expires) expiring at or after min_expires, read in one transaction"""
+        yield from self._conn.get().execute(
+            'SELECT key, value, expires FROM entries WHERE expires >= ?', (min_expires,)
+        )
+
+    def merge(self, rows: Iterable[Tuple[str, bytes, float]]) -> int:
+        """Insert entries in one transaction, keeping whichever copy of a key expires later"""
+        conn = self._conn.get()
+        conn.execute('BEGIN')
+        try:
+            cur = conn.executemany(
+                'INSERT INTO entries (key, value, expires) VALUES (?, ?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires = excluded.expires '
+                'WHERE excluded.expires > entries.expires',
+                rows
+            )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return cur.rowcount
+
+    def is_empty(self) -> bool:
+        return self._conn.get().execute('SELECT 1 FROM entries LIMIT 1').fetchone() is None
+
+    def get_or_load(self, key: str, ttl: float, loader: Callable[[], bytes]) -> bytes:
+        """
+        Return the cached value for key, calling loader() to refresh it when
+        missing or expired. Exactly one worker on the host refreshes a key at a time;
+        the others serve the stale value if it is within the grace period and
+        wait for the refresh otherwise. If the refresh fails, a stale value within
+        the grace period is served instead; the error is raised only when there is
+        nothing to fall back on.
+        """
+        deadline = time.time() + self.lease_timeout
+        while True:
+            entry = self.get_entry(key)
+            if entry is not None and entry[1] >= time.time():
+                return entry[0]
+
+            if self._acquire_lease(key):
+                try:
+                    # Another worker may have finished a refresh just before we took the lease
+                    fresh = self.get(key)
+                    if fresh is not None:
+                        return fresh
+                    try:
+                        value = loader()
+                    except Exception as e:
+                        if entry is None or entry[1] < time.time() - self.stale_grace:
+                            raise
+                        logger.warning(f'Refresh of {key} failed, serving stale value: {e}')
+                        return entry[0]
+                    self.set(key, value, ttl)
+                    return value
+                finally:
+                    self._release_lease(key)
+
+            # Someone else is refreshing: serve stale data within the grace period rather
+            # than queueing behind them; anything older waits for the fresh value
+            if entry is not None and entry[1] >= time.time() - self.stale_grace:
+                return entry[0]
+            if time.time() > deadline:
+                raise TimeoutError(f'Timed out waiting for cache refresh of {key}')
+            time.sleep(POLL_INTERVAL)
+
+    def clear(self) -> None:
+        conn = self._conn.get()
+        conn.execute('DELETE FROM entries')
+        conn.execute('DELETE FROM leases')
+
+def init_shared_cache(app) -> SharedCache:
+    """Attach the host-wide cache to the app"""
+    cache = SharedCache(
+        app.config['CACHE_PATH'],
+        lease_timeout=app.config['CACHE_LEASE_TIMEOUT'],
+        stale_grace=app.config['CACHE_STALE_GRACE']
+    )
+    app.extensions['shared_cache'] = cache
+    return cache
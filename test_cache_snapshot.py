@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Cache snapshot tests - round trip and rejection of damaged files
+"""
+
+import os
+import zlib
+import pytest
+from shared_cache import SharedCache
+from cache_snapshot import HEADER, HEADER_FIELDS, write_snapshot, restore_snapshot, restore_if_empty
+
+@pytest.fixture
+def snapshot(tmp_path):
+    """A snapshot of a cache holding a few entries, and the entries themselves"""
+    cache = SharedCache(str(tmp_path / 'source.db'))
+    entries = {f'candles:v2:S{i}:1y:1d': os.urandom(100 + i) for i in range(20)}
+    for key, value in entries.items():
+        cache.set(key, value, 300)
+    cache.set('expired', b'gone', -2 * cache.stale_grace)
+    path = str(tmp_path / 'cache.snapshot')
+    assert write_snapshot(cache, path) == len(entries)
+    return path, entries
+
+def empty_cache(tmp_path, name='restored.db'):
+    return SharedCache(str(tmp_path / name))
+
+def rewrite(path, offset, data):
+    with open(path, 'r+b') as f:
+        f.seek(offset)
+        f.write(data)
+
+def test_round_trip(tmp_path, snapshot):
+    path, entries = snapshot
+    cache = empty_cache(tmp_path)
+    assert restore_snapshot(cache, path) == len(entries)
+    for key, value in entries.items():
+        assert cache.get(key) == value
+    assert cache.get_entry('expired') is None
+    # Merging the same snapshot again never replaces entries with ones expiring no later
+    assert restore_snapshot(cache, path) == 0
+
+def test_truncated_file_is_rejected(tmp_path, snapshot):
+    path, _ = snapshot
+    os.truncate(path, os.path.getsize(path) - 50)
+    with pytest.raises(ValueError):
+        restore_snapshot(empty_cache(tmp_path), path)
+    os.truncate(path, HEADER.size - 1)
+    with pytest.raises(ValueError):
+        restore_snapshot(empty_cache(tmp_path), path)
+
+def test_bit_flip_is_rejected(tmp_path, snapshot):
+    path, _ = snapshot
+    offset = HEADER.size + 200
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        byte = f.read(1)[0]
+    rewrite(path, offset, bytes([byte ^ 0x10]))
+    with pytest.raises(ValueError, match='checksum'):
+        restore_snapshot(empty_cache(tmp_path), path)
+
+def test_bad_count_is_rejected_and_ignored_on_boot(tmp_path, snapshot):
+    path, entries = snapshot
+    with open(path, 'rb') as f:
+        fields = list(HEADER.unpack(f.read(HEADER.size)))
+    fields[3] = len(entries) + 5
+    rewrite(path, 0, HEADER.pack(*fields))
+    with pytest.raises(ValueError):
+        restore_snapshot(empty_cache(tmp_path), path)
+
+    # A damaged snapshot is logged and skipped on boot instead of failing create_app()
+    cache = empty_cache(tmp_path, 'boot.db')
+    assert restore_if_empty(cache, path) == 0
+    assert cache.is_empty()
+
+def test_bad_count_with_matching_checksum_is_rejected(tmp_path, snapshot):
+    path, entries = snapshot
+    with open(path, 'rb') as f:
+        data = f.read()
+    fields = list(HEADER.unpack_from(data))[:-1]
+    fields[3] = len(entries) + 5
+    crc = zlib.crc32(HEADER_FIELDS.pack(*fields), zlib.crc32(data[HEADER.size:]))
+    rewrite(path, 0, HEADER.pack(*fields, crc))
+    with pytest.raises(ValueError, match='truncated'):
+        restore_snapshot(empty_cache(tmp_path), path)
+
+    fields[3] = 10 ** 12
+    crc = zlib.crc32(HEADER_FIELDS.pack(*fields), zlib.crc32(data[HEADER.size:]))
+    rewrite(path, 0, HEADER.pack(*fields, crc))
+    with pytest.raises(ValueError, match='exceeds'):
+        restore_snapshot(empty_cache(tmp_path), path)
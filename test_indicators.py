@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Streaming indicator tests - incremental amends and snapshots against a full recompute
+"""
+
+import math
+import numpy as np
+import pytest
+import indicators
+from candles import CandleSeries
+from indicators import HistoryMissing, IndicatorSeries, dump_history, dump_series, load_series
+
+KEYS = ['sma:5', 'ema:5', 'rsi:5', 'vwap:5', 'max:5', 'min:5']
+
+def make_candles(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return CandleSeries(
+        1_700_000_000 + np.arange(n, dtype=np.int64) * 86400,
+        close + rng.normal(0, 0.3, n),
+        close + rng.uniform(0.5, 1.5, n),
+        close - rng.uniform(0.5, 1.5, n),
+        close,
+        rng.integers(1_000, 10_000, n).astype(np.int64)
+    )
+
+def revised(candles, close_factor, high_factor, low_factor):
+    """Copy of a series with its last (live) bar revised"""
+    columns = {name: getattr(candles, name).copy() for name in CandleSeries.__slots__}
+    columns['close'][-1] *= close_factor
+    columns['high'][-1] *= high_factor
+    columns['low'][-1] *= low_factor
+    return CandleSeries(**columns)
+
+def assert_matches_recompute(series, candles):
+    full = IndicatorSeries(KEYS)
+    full.apply(candles)
+    got_values, want_values = series.since(), full.since()
+    assert got_values['time'] == want_values['time'] == candles.time.tolist()
+    for key in KEYS:
+        for got, want in zip(got_values['values'][key], want_values['values'][key]):
+            if want is None:
+                assert got is None, key
+            else:
+                assert math.isclose(got, want, rel_tol=1e-9, abs_tol=1e-9), key
+
+def test_amend_then_append_matches_recompute():
+    candles = make_candles(60)
+    series = IndicatorSeries(KEYS)
+    series.apply(candles[:40])
+
+    # Live bar revised up, then back down (the rolling max/min slow path), then closed
+    for factors in ((1.02, 1.05, 1.0), (0.97, 0.99, 0.95)):
+        amended = revised(candles[:40], *factors)
+        assert series.apply(amended) == 1
+        assert_matches_recompute(series, amended)
+
+    assert series.apply(candles) == 21
+    assert_matches_recompute(series, candles)
+    assert series.apply(candles) == 0
+
+def saved(series, store):
+    """Save a series the way the indicators endpoint does: changed blocks, then the state"""
+    store.update(dump_history(series))
+    return dump_series(series)
+
+def test_snapshot_round_trip_resumes_incrementally(monkeypatch):
+    monkeypatch.setattr(indicators, 'HISTORY_BLOCK', 8)
+    candles = make_candles(60, seed=1)
+    store = {}
+    series = IndicatorSeries(KEYS)
+    series.apply(revised(candles[:30], 1.01, 1.03, 0.98))
+
+    restored = load_series(saved(series, store), KEYS, store.get)
+    assert restored.since() == series.since()
+    restored.apply(candles)
+    assert_matches_recompute(restored, candles)
+    # Only the block holding the amended bar and the new ones were rewritten
+    assert sorted(int(name.split(':')[1]) for name in dump_history(restored)) == list(range(3, 8))
+
+def test_since_and_refresh_read_only_the_tail_blocks(monkeypatch):
+    monkeypatch.setattr(indicators, 'HISTORY_BLOCK', 8)
+    candles = make_candles(80, seed=2)
+    store = {}
+    series = IndicatorSeries(KEYS)
+    series.apply(candles[:60])
+    state = saved(series, store)
+
+    reads = []
+    def read_block(name):
+        reads.append(int(name.split(':')[1]))
+        return store.get(name)
+
+    restored = load_series(state, KEYS, read_block)
+    tail = restored.since(int(candles.time[50]))
+    assert tail == series.since(int(candles.time[50]))
+    assert len(tail['time']) == 10 and tail['length'] == 60
+    assert reads == [7, 6]
+
+    # The window slides forward: only the last block is read to resume, and old bars drop out
+    reads.clear()
+    restored = load_series(state, KEYS, read_block)
+    assert restored.apply(candles[20:]) == 21
+    assert reads == [7]
+    assert len(restored) == 60
+    assert restored.since()['time'] == candles.time[20:].tolist()
+
+def test_missing_history_block_raises():
+    store = {}
+    series = IndicatorSeries(KEYS)
+    series.apply(make_candles(5000))
+    state = saved(series, store)
+    del store[series.block_name(0)]
+
+    restored = load_series(state, KEYS, store.get)
+    assert len(restored.since(int(series.since()['time'][-1]))['time']) == 1
+    with pytest.raises(HistoryMissing):
+        restored.since()
+
+def test_load_series_rejects_bad_snapshots():
+    series = IndicatorSeries(KEYS)
+    series.apply(make_candles(20))
+    good = dump_series(series)
+
+    for buf in (None, b'', b'\x80\x04not json', good.replace(b'"ring":[', b'"ring":[1.0,'),
+                good.replace(b'"end":20', b'"end":0'), good[:-10]):
+        fresh = load_series(buf, KEYS)
+        assert len(fresh) == 0 and fresh.last_row is None
+    assert len(load_series(good, ['sma:5'])) == 0
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Opportunity journal tests - torn-line recovery, segment rotation and cursor tailing
+"""
+
+import os
+from archived_components.opportunity_journal import (
+    OpportunityJournal, list_segments, read_journal, segment_name
+)
+
+def records(start, count):
+    return [{'ticker': f'T{i}', 'spread': i / 100} for i in range(start, start + count)]
+
+def open_journal(directory, **kwargs):
+    return OpportunityJournal(str(directory), flush_interval=0.01, fsync=False, **kwargs)
+
+def test_torn_final_line_is_dropped_on_open(tmp_path):
+    journal = open_journal(tmp_path)
+    journal.append(records(0, 3))
+    journal.close()
+    with open(tmp_path / segment_name(1), 'ab') as f:
+        f.write(b'{"ticker":"T3","spr')
+
+    # Readers skip the torn line, and reopening truncates it before appending
+    assert read_journal(str(tmp_path))[0] == records(0, 3)
+    journal = open_journal(tmp_path)
+    journal.append(records(3, 2))
+    journal.close()
+    assert read_journal(str(tmp_path))[0] == records(0, 5)
+
+def test_segments_rotate_and_read_in_order(tmp_path):
+    journal = open_journal(tmp_path, segment_bytes=200)
+    for start in range(0, 40, 4):
+        journal.append(records(start, 4))
+        journal.flush()
+    journal.close()
+
+    segments = list_segments(str(tmp_path))
+    assert len(segments) > 1 and segments == list(range(1, len(segments) + 1))
+    assert read_journal(str(tmp_path))[0] == records(0, 40)
+
+def test_cursor_tails_across_segments_and_partial_writes(tmp_path):
+    journal = open_journal(tmp_path, segment_bytes=200)
+    journal.append(records(0, 6))
+    journal.flush()
+    seen, cursor = read_journal(str(tmp_path), limit=4)
+    assert seen == records(0, 4)
+
+    journal.append(records(6, 10))
+    journal.flush()
+    journal.close()
+    # A record still being written is left for the next read
+    with open(tmp_path / segment_name(list_segments(str(tmp_path))[-1]), 'ab') as f:
+        f.write(b'{"ticker":"T16"')
+
+    tail, cursor = read_journal(str(tmp_path), cursor)
+    assert seen + tail == records(0, 16)
+    assert read_journal(str(tmp_path), cursor) == ([], cursor)
+
+    with open(tmp_path / segment_name(cursor[0]), 'ab') as f:
+        f.write(b',"spread":0.16}\n')
+    assert read_journal(str(tmp_path), cursor)[0] == records(16, 1)
+
+def test_on_flush_reports_each_batch_with_its_cursor(tmp_path):
+    flushed = []
+    journal = open_journal(tmp_path, on_flush=lambda batch, cursor: flushed.append((batch, cursor)))
+    journal.append(records(0, 3))
+    journal.flush()
+    journal.append(records(3, 2))
+    journal.close()
+
+    assert [batch for batch, _ in flushed] == [records(0, 3), records(3, 2)]
+    first_cursor = flushed[0][1]
+    assert read_journal(str(tmp_path), first_cursor)[0] == records(3, 2)
+    assert flushed[-1][1] == (1, os.path.getsize(tmp_path / segment_name(1)))
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Rate limiter tests - token-bucket math and the 429 response
+"""
+
+import sqlite3
+import pytest
+from flask import Flask, jsonify
+import rate_limit
+from rate_limit import TokenBucketLimiter, init_rate_limiter, rate_limited, charge_upstream
+from utils import handle_api_errors
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit, 'time', clock)
+    return clock
+
+def test_bucket_spends_and_refills(tmp_path, clock):
+    # 3 requests per 3 seconds: one token a second
+    limiter = TokenBucketLimiter(str(tmp_path / 'limits.db'), 3, 3)
+    assert [limiter.consume('a')[0] for _ in range(3)] == [True, True, True]
+    allowed, remaining, retry_after = limiter.consume('a')
+    assert not allowed and remaining == 0 and retry_after == pytest.approx(1.0)
+
+    # Other keys have their own bucket
+    assert limiter.consume('b')[0]
+
+    clock.now += 1.5
+    allowed, remaining, _ = limiter.consume('a')
+    assert allowed and remaining == pytest.approx(0.5)
+
+    # Refill stops at capacity however long the bucket sat idle
+    clock.now += 3600
+    assert limiter.consume('a', 3)[1] == pytest.approx(0)
+    assert limiter.consume('a', 0.5) == (False, 0, pytest.approx(0.5))
+
+@pytest.fixture
+def client(tmp_path, clock):
+    app = Flask(__name__)
+    app.config.update(
+        RATE_LIMIT_STORAGE=str(tmp_path / 'limits.db'),
+        RATE_LIMIT_REQUESTS=3,
+        RATE_LIMIT_PERIOD=30,
+        RATE_LIMIT_CACHED_COST=0.5
+    )
+    init_rate_limiter(app)
+
+    @app.route('/cached')
+    @rate_limited
+    @handle_api_errors
+    def cached():
+        return jsonify({'ok': True})
+
+    @app.route('/upstream/<int:calls>')
+    @rate_limited
+    @handle_api_errors
+    def upstream(calls):
+        charge_upstream(calls)
+        return jsonify({'ok': True})
+
+    return app.test_client()
+
+def test_over_limit_requests_get_429_with_retry_after(client):
+    assert [client.get('/cached').status_code for _ in range(6)] == [200] * 6
+    response = client.get('/cached')
+    assert response.status_code == 429
+    # Half a token short at a tenth of a token a second
+    assert response.headers['Retry-After'] == '5'
+    assert response.json['retryAfter'] == 5
+
+    # Clients are told apart by address
+    assert client.get('/cached', environ_base={'REMOTE_ADDR': '10.0.0.2'}).status_code == 200
+
+def test_upstream_calls_are_charged_up_front(client):
+    # 0.5 cached + 1.5 more for two upstream calls leaves one token
+    assert client.get('/upstream/2').status_code == 200
+    # Three calls need 2.5 more tokens after the cached charge, with 0.5 left: 2 short
+    response = client.get('/upstream/3')
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '20'
+
+def test_limiter_errors_fail_open(client, monkeypatch):
+    def locked(self, key, cost=1.0):
+        raise sqlite3.OperationalError('database is locked')
+    monkeypatch.setattr(TokenBucketLimiter, 'consume', locked)
+    assert [client.get('/upstream/5').status_code for _ in range(10)] == [200] * 10
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Shared cache tests - single-flight refreshes and stale-grace serving
+"""
+
+import time
+import threading
+import pytest
+from shared_cache import SharedCache
+
+GRACE = 60.0
+
+@pytest.fixture
+def cache(tmp_path):
+    return SharedCache(str(tmp_path / 'cache.db'), lease_timeout=2.0, stale_grace=GRACE)
+
+def test_concurrent_misses_call_the_loader_once(cache):
+    calls = []
+    def loader():
+        calls.append(threading.get_ident())
+        time.sleep(0.2)
+        return b'fresh'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load('k', 60, loader))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [b'fresh'] * 5
+    assert len(calls) == 1
+
+def test_stale_value_within_grace_is_served_while_another_worker_refreshes(cache):
+    cache.set('k', b'stale', -GRACE / 2)
+    with cache.lease('k') as acquired:
+        assert acquired
+        # The lease is held by this thread, so get_or_load sees another refresher
+        assert cache.get_or_load('k', 60, lambda: pytest.fail('loader must not run')) == b'stale'
+
+def test_value_past_grace_waits_for_the_refresh(cache):
+    cache.set('k', b'ancient', -2 * GRACE)
+    with cache.lease('k'):
+        threading.Timer(0.2, cache.set, ('k', b'fresh', 60)).start()
+        assert cache.get_or_load('k', 60, lambda: pytest.fail('loader must not run')) == b'fresh'
+
+def test_waiter_takes_over_an_abandoned_lease(tmp_path):
+    cache = SharedCache(str(tmp_path / 'cache.db'), lease_timeout=0.2, stale_grace=GRACE)
+    cache.set('k', b'ancient', -2 * GRACE)
+    # A refresher that died holding the lease: once it expires the waiter loads itself
+    assert cache._acquire_lease('k')
+    assert cache.get_or_load('k', 60, lambda: b'fresh') == b'fresh'
+
+def test_failed_refresh_serves_stale_only_within_grace(cache):
+    def failing():
+        raise LookupError('upstream down')
+
+    cache.set('recent', b'stale', -GRACE / 2)
+    assert cache.get_or_load('recent', 60, failing) == b'stale'
+
+    cache.set('old', b'ancient', -2 * GRACE)
+    with pytest.raises(LookupError):
+        cache.get_or_load('old', 60, failing)
+    with pytest.raises(LookupError):
+        cache.get_or_load('missing', 60, failing)
+
+    # A failed refresh releases the lease, so the next caller can load
+    assert cache.get_or_load('old', 60, lambda: b'fresh') == b'fresh'
@@ -8,6 +8,7 @@ import logging
 import functools
 from flask import jsonify
 from typing import Callable, Any
+from rate_limit import RateLimitExceeded, rate_limit_response
 
 def setup_logging():
     """Setup logging configuration"""
@@ -30,6 +31,8 @@ def handle_api_errors(f: Callable) -> Callable:
     def wrapper(*args, **kwargs):
         try:
             return f(*args, **kwargs)
+        except RateLimitExceeded as e:
+            return rate_limit_response(e.retry_after)
         except ValueError as e:
             return jsonify({'error': f'Validation error: {str(e)}'}), 400
         except Exception as e: